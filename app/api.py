@@ -1,13 +1,52 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Security
+from fastapi import FastAPI, Depends, HTTPException, Request, status, Security, Body, Query
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.security.api_key import APIKeyHeader
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from pydantic import BaseModel
-from sqlalchemy import create_engine, text
+from limits import parse as parse_rate_limit
+from limits.storage import MemoryStorage
+from limits.strategies import MovingWindowRateLimiter
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+import hashlib
+import math
 import os
 from dotenv import load_dotenv
 
+from app.db import (
+    sqlalchemy_url,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+)
+from app.ingest import (
+    OutbreakRecord,
+    INSERT_QUERY,
+    STREAM_CHUNK_ROWS,
+    validate_rows,
+    write_rows,
+    iter_lines,
+    iter_ndjson,
+    iter_csv,
+    stream_ingest,
+    PartialIngest,
+    UploadParseError,
+)
+from app.migrations import WATERMARK_COLUMN
+from app.write_queue import WriteQueue
+from app.query import GROUP_COLUMNS, ROW_COLUMNS, VERSION_QUERY, aggregate_query, data_version, rows_query
+from app import metrics
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
 # Load environment variables
 load_dotenv()
 
@@ -26,55 +65,422 @@ def get_api_key(api_key_header: str = Security(api_key_header)) -> str:
         detail="Invalid or missing API Key"
     )
 
+# Database connection
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL environment variable is required")
+
+def create_db_engine(url: str) -> AsyncEngine:
+    """Create the async engine with a bounded, pre-pinged connection pool."""
+    return create_async_engine(
+        sqlalchemy_url(url),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+# Opt-in write coalescing for /push-data: records are queued, acknowledged
+# with 202 and flushed as multi-row INSERTs every N rows or M milliseconds
+WRITE_QUEUE = os.getenv("WRITE_QUEUE", "0") == "1"
+WRITE_QUEUE_MAX_ROWS = int(os.getenv("WRITE_QUEUE_MAX_ROWS", "10000"))
+WRITE_QUEUE_FLUSH_ROWS = int(os.getenv("WRITE_QUEUE_FLUSH_ROWS", "500"))
+WRITE_QUEUE_FLUSH_MS = float(os.getenv("WRITE_QUEUE_FLUSH_MS", "50"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the connection pool on startup and dispose of it on shutdown.
+
+    With ``WRITE_QUEUE=1`` the write queue is started too, and drained
+    before the pool closes.
+    """
+    app.state.engine = create_db_engine(DATABASE_URL)
+    app.state.write_queue = None
+    if WRITE_QUEUE:
+        app.state.write_queue = WriteQueue(
+            app.state.engine,
+            max_rows=WRITE_QUEUE_MAX_ROWS,
+            flush_rows=WRITE_QUEUE_FLUSH_ROWS,
+            flush_ms=WRITE_QUEUE_FLUSH_MS,
+        )
+        app.state.write_queue.start()
+    try:
+        yield
+    finally:
+        if app.state.write_queue is not None:
+            await app.state.write_queue.stop()
+        await app.state.engine.dispose()
+
+def get_engine(request: Request) -> AsyncEngine:
+    return request.app.state.engine
+
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 app = FastAPI(
     title="GIS Data Ingestion API",
     description="API endpoint to ingest outbreak records into the database",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Read responses (JSON and Arrow) are compressed for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
-# Database connection
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL environment variable is required")
-engine = create_engine(DATABASE_URL)
-
-# Pydantic model for an outbreak record
-class OutbreakRecord(BaseModel):
-    year: int
-    disease: str
-    country: str
-    iso3: str | None = None
-    icd10n: str | None = None
-    unsd_region: str | None = None
-    unsd_subregion: str | None = None
-    who_region: str | None = None
-    DONs: str | None = None
+# Batch ingestion is limited by rows rather than requests
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "10000"))
+BATCH_ROW_RATE_LIMIT = parse_rate_limit(os.getenv("BATCH_ROW_RATE_LIMIT", "50000/hour"))
+row_limiter = MovingWindowRateLimiter(MemoryStorage())
+
+def charge_rows(request: Request, rows: int) -> None:
+    """Charge ``rows`` against the caller's row rate limit."""
+    if not row_limiter.hit(BATCH_ROW_RATE_LIMIT, "push-data-batch", get_remote_address(request), cost=rows):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Row rate limit exceeded: {BATCH_ROW_RATE_LIMIT}"
+        )
+
+# Ingestion metrics, exported at /metrics
+INGEST_REQUESTS = metrics.counter(
+    "gis_ingest_requests_total", "Ingestion requests by endpoint and outcome.", ("endpoint", "outcome")
+)
+INGEST_ROWS = metrics.counter(
+    "gis_ingest_rows_total", "Rows received by endpoint, inserted or rejected.", ("endpoint", "outcome")
+)
+INGEST_WRITE_SECONDS = metrics.histogram(
+    "gis_ingest_write_seconds", "Time spent writing a request's rows (streams include parsing).", ("endpoint",)
+)
+
+def record_ingest(endpoint: str, outcome: str, inserted: int = 0, rejected: int = 0) -> None:
+    INGEST_REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+    if inserted:
+        INGEST_ROWS.inc(inserted, endpoint=endpoint, outcome="inserted")
+    if rejected:
+        INGEST_ROWS.inc(rejected, endpoint=endpoint, outcome="rejected")
+
+def batch_rows(payload: list[dict[str, Any]] | dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """Normalize a batch payload to a list of row dicts.
+
+    Accepts either a JSON array of records or columnar arrays
+    (``{"year": [...], "disease": [...], ...}``) of equal length.
+    """
+    if isinstance(payload, list):
+        return payload
+    lengths = {len(values) for values in payload.values()}
+    if len(lengths) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Columnar batch arrays must all have the same length"
+        )
+    columns = list(payload)
+    return [dict(zip(columns, values)) for values in zip(*payload.values())]
 
 @app.post(
     "/push-data",
     dependencies=[Depends(get_api_key)]
 )
 @limiter.limit("5/minute")
-async def push_data(record: OutbreakRecord):
-    """Push a single outbreak record to the database."""
-    try:
-        with engine.begin() as conn:
-            insert_query = text(
-                """
-                INSERT INTO outbreaks
-                (year, disease, country, iso3, icd10n, unsd_region, unsd_subregion, who_region, DONs)
-                VALUES
-                (:year, :disease, :country, :iso3, :icd10n, :unsd_region, :unsd_subregion, :who_region, :DONs)
-                """
+async def push_data(
+    request: Request,
+    record: OutbreakRecord,
+    engine: AsyncEngine = Depends(get_engine)
+):
+    """Push a single outbreak record to the database.
+
+    With the write queue enabled the record is queued and acknowledged with
+    202 Accepted; a full queue answers 503 with ``Retry-After``.
+    """
+    queue: WriteQueue | None = getattr(request.app.state, "write_queue", None)
+    if queue is not None:
+        if not queue.submit(record.dict()):
+            record_ingest("single", "queue_full")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Write queue is full, retry shortly",
+                headers={"Retry-After": str(max(1, math.ceil(WRITE_QUEUE_FLUSH_MS / 1000)))},
             )
-            conn.execute(insert_query, **record.dict())
+        record_ingest("single", "queued")
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": "accepted", "message": "Record queued for insertion"},
+        )
+    try:
+        with INGEST_WRITE_SECONDS.time(endpoint="single"):
+            async with engine.begin() as conn:
+                await conn.execute(INSERT_QUERY, record.dict())
     except Exception as e:
+        record_ingest("single", "error")
         raise HTTPException(
             status_code=500,
             detail=f"Database insertion failed: {e}"
         )
+    record_ingest("single", "success", inserted=1)
     return {"status": "success", "message": "Record inserted successfully"}
+
+@app.post(
+    "/push-data/batch",
+    dependencies=[Depends(get_api_key)]
+)
+async def push_data_batch(
+    request: Request,
+    payload: list[dict[str, Any]] | dict[str, list[Any]] = Body(...),
+    engine: AsyncEngine = Depends(get_engine)
+):
+    """Push many outbreak records in a single transaction.
+
+    Invalid rows are reported individually and skipped; valid rows are
+    written with one multi-row INSERT. The rate limit is charged per row.
+    """
+    rows = batch_rows(payload)
+    if not rows:
+        raise HTTPException(status_code=422, detail="Batch contains no records")
+    if len(rows) > MAX_BATCH_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds the maximum of {MAX_BATCH_ROWS} records"
+        )
+    charge_rows(request, len(rows))
+
+    valid, errors = validate_rows(rows)
+    if not valid:
+        record_ingest("batch", "rejected", rejected=len(errors))
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"inserted": 0, "rejected": len(errors), "errors": errors}
+        )
+    try:
+        with INGEST_WRITE_SECONDS.time(endpoint="batch"):
+            async with engine.begin() as conn:
+                await write_rows(conn, valid)
+    except Exception as e:
+        record_ingest("batch", "error")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Database insertion failed: {e}"
+        )
+    record_ingest("batch", "success" if not errors else "partial", inserted=len(valid), rejected=len(errors))
+    return {
+        "status": "success" if not errors else "partial",
+        "inserted": len(valid),
+        "rejected": len(errors),
+        "errors": errors,
+    }
+
+@app.post(
+    "/push-data/stream",
+    dependencies=[Depends(get_api_key)]
+)
+async def push_data_stream(
+    request: Request,
+    format: str | None = None,
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    engine: AsyncEngine = Depends(get_engine)
+):
+    """Stream an NDJSON or CSV upload into the database.
+
+    The body is parsed incrementally and written with COPY in chunks of
+    ``chunk_size`` rows, so arbitrarily large files can be uploaded in one
+    request. The format is taken from ``format`` (``ndjson`` or ``csv``) or
+    the Content-Type header. Rows count against the row rate limit.
+
+    Every chunk is committed on its own. If the upload fails part way (rate
+    limit, bad encoding, database error) the error's ``detail`` carries a
+    ``message`` plus the ``accepted``/``rejected`` totals of the chunks
+    already committed, so the client can resume after them.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = format or {
+        "application/x-ndjson": "ndjson",
+        "application/jsonl": "ndjson",
+        "application/json-seq": "ndjson",
+        "text/csv": "csv",
+    }.get(content_type)
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be NDJSON or CSV (set Content-Type or ?format=ndjson|csv)"
+        )
+    if not 1 <= chunk_size <= MAX_BATCH_ROWS:
+        raise HTTPException(status_code=422, detail=f"chunk_size must be between 1 and {MAX_BATCH_ROWS}")
+
+    parse = iter_ndjson if fmt == "ndjson" else iter_csv
+    try:
+        with INGEST_WRITE_SECONDS.time(endpoint="stream"):
+            result = await stream_ingest(
+                engine,
+                parse(iter_lines(request.stream())),
+                chunk_size=chunk_size,
+                on_chunk=lambda rows: charge_rows(request, rows),
+            )
+    except PartialIngest as e:
+        # Earlier chunks stay committed; report them with the error
+        committed = e.result
+        if isinstance(e.cause, HTTPException):
+            outcome, status_code, message = "rejected", e.cause.status_code, e.cause.detail
+        elif isinstance(e.cause, UploadParseError):
+            outcome, status_code, message = "rejected", 400, str(e.cause)
+        else:
+            outcome, status_code, message = "error", 500, f"Database insertion failed: {e.cause}"
+        record_ingest("stream", outcome, inserted=committed["accepted"], rejected=committed["rejected"])
+        raise HTTPException(status_code=status_code, detail={"message": message, **committed})
+    record_ingest("stream", "success" if not result["rejected"] else "partial",
+                  inserted=result["accepted"], rejected=result["rejected"])
+    return {"status": "success" if not result["rejected"] else "partial", **result}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """Ingestion and stage metrics in the Prometheus text format."""
+    return Response(content=metrics.render_prometheus(), media_type=metrics.CONTENT_TYPE)
+
+
+# Read endpoints
+MAX_PAGE_ROWS = int(os.getenv("MAX_PAGE_ROWS", "10000"))
+READ_RATE_LIMIT = os.getenv("READ_RATE_LIMIT", "120/minute")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+READ_REQUESTS = metrics.counter(
+    "gis_read_requests_total", "Read requests by endpoint and outcome (ok or not_modified).", ("endpoint", "outcome")
+)
+
+@dataclass(frozen=True)
+class ReadFilters:
+    """Accepted values per column (None means any) and an inclusive year range."""
+    criteria: dict[str, list | None]
+    year_range: tuple[int | None, int | None]
+
+def read_filters(
+    year: list[int] | None = Query(None),
+    year_from: int | None = None,
+    year_to: int | None = None,
+    disease: list[str] | None = Query(None),
+    icd10n: list[str] | None = Query(None),
+    iso3: list[str] | None = Query(None),
+    country: list[str] | None = Query(None),
+    unsd_region: list[str] | None = Query(None),
+    unsd_subregion: list[str] | None = Query(None),
+    who_region: list[str] | None = Query(None),
+) -> ReadFilters:
+    """Filters shared by the read endpoints; repeat a parameter to accept several values."""
+    return ReadFilters(
+        criteria={
+            "year": year, "disease": disease, "icd10n": icd10n, "iso3": iso3, "country": country,
+            "unsd_region": unsd_region, "unsd_subregion": unsd_subregion, "who_region": who_region,
+        },
+        year_range=(year_from, year_to),
+    )
+
+def wants_arrow(request: Request, format: str | None) -> bool:
+    """Arrow IPC when asked for by ``?format=arrow`` or the Accept header."""
+    if format not in (None, "json", "arrow"):
+        raise HTTPException(status_code=422, detail="format must be json or arrow")
+    arrow = format == "arrow" or (format is None and ARROW_MEDIA_TYPE in request.headers.get("accept", ""))
+    if arrow and pa is None:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="Arrow responses need pyarrow")
+    return arrow
+
+def entity_tag(version: str, request: Request, arrow: bool) -> str:
+    """ETag for a read: the data version plus a digest of the query.
+
+    The tag is weak because GZipMiddleware serves the same tag for the
+    gzip and identity encodings, which are not byte-for-byte identical.
+    """
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.blake2b(f"{request.url.path}|{query}|{arrow}".encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def arrow_response(keys: list[str], rows: list, headers: dict[str, str]) -> Response:
+    """Rows as one Arrow IPC stream."""
+    columns = list(zip(*rows)) if rows else [()] * len(keys)
+    table = pa.table({key: list(values) for key, values in zip(keys, columns)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+async def versioned_read(request: Request, endpoint: str, engine: AsyncEngine, arrow: bool, statement):
+    """Run ``statement`` unless the client's cached copy is current.
+
+    Returns (keys, rows, headers), or a 304 response when the ETag matches.
+    """
+    sql, params = statement
+    async with engine.connect() as conn:
+        version = data_version((await conn.execute(VERSION_QUERY)).one())
+        etag = entity_tag(version, request, arrow)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if not_modified(request, etag):
+            READ_REQUESTS.inc(endpoint=endpoint, outcome="not_modified")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        result = await conn.execute(sql, params)
+        keys, rows = list(result.keys()), result.all()
+    READ_REQUESTS.inc(endpoint=endpoint, outcome="ok")
+    return keys, rows, headers
+
+@app.get(
+    "/outbreaks",
+    dependencies=[Depends(get_api_key)]
+)
+@limiter.limit(READ_RATE_LIMIT)
+async def read_outbreaks(
+    request: Request,
+    filters: ReadFilters = Depends(read_filters),
+    after: int | None = Query(None, ge=0, description="Return rows after this row_id (keyset cursor)"),
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_ROWS),
+    columns: list[str] | None = Query(None, description=f"Subset of {list(ROW_COLUMNS)}"),
+    format: str | None = None,
+    engine: AsyncEngine = Depends(get_engine)
+):
+    """Filtered rows ordered by ``row_id``, one keyset page at a time.
+
+    Pass the returned ``next_after`` (also sent as ``X-Next-After``) as
+    ``after`` to fetch the next page; it is null on the last page.
+    """
+    arrow = wants_arrow(request, format)
+    try:
+        statement = rows_query(filters.criteria, filters.year_range, after, limit, columns or ROW_COLUMNS)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    read = await versioned_read(request, "rows", engine, arrow, statement)
+    if isinstance(read, Response):
+        return read
+    keys, rows, headers = read
+    next_after = rows[-1][keys.index(WATERMARK_COLUMN)] if len(rows) == limit else None
+    if next_after is not None:
+        headers["X-Next-After"] = str(next_after)
+    if arrow:
+        return arrow_response(keys, rows, headers)
+    return JSONResponse(
+        {"rows": [dict(zip(keys, row)) for row in rows], "next_after": next_after},
+        headers=headers,
+    )
+
+@app.get(
+    "/outbreaks/aggregate",
+    dependencies=[Depends(get_api_key)]
+)
+@limiter.limit(READ_RATE_LIMIT)
+async def aggregate_outbreaks(
+    request: Request,
+    by: list[str] = Query(..., description=f"One or more of {list(GROUP_COLUMNS)}"),
+    filters: ReadFilters = Depends(read_filters),
+    format: str | None = None,
+    engine: AsyncEngine = Depends(get_engine)
+):
+    """Outbreak counts grouped by ``by``, computed in the database."""
+    arrow = wants_arrow(request, format)
+    try:
+        statement = aggregate_query(filters.criteria, by, filters.year_range)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    read = await versioned_read(request, "aggregate", engine, arrow, statement)
+    if isinstance(read, Response):
+        return read
+    keys, rows, headers = read
+    if arrow:
+        return arrow_response(keys, rows, headers)
+    return JSONResponse({"by": by, "groups": [dict(zip(keys, row)) for row in rows]}, headers=headers)
@@ -0,0 +1,227 @@
+"""Query backends behind the dashboard's filters and aggregates.
+
+``PandasBackend`` answers everything from the loaded frame's count cube
+(database load, snapshot or CSV fallback). ``SqlBackend`` pushes the
+sidebar selection and the grouping down to the database as parameterized
+GROUP BY queries, so the dashboard never holds the raw table; results are
+cached per data version (``MAX(row_id)`` and the row count, re-read every
+``DATA_CACHE_TTL_SECONDS`` or on refresh). Both return frames shaped like
+cube cells (label columns plus an ``outbreaks`` count), so chart code does
+not depend on the backend. ``DATA_BACKEND`` selects one.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Protocol, Sequence
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .cache import LRUCache
+from .config import DATA_BACKEND, DATA_CACHE_TTL_SECONDS
+from .cube import COUNT_COLUMN, CUBE_DIMENSIONS, outbreak_cube, rollup
+from .data import (
+    COLUMN_DTYPES,
+    _select_columns,
+    disease_options,
+    filter_df,
+    filter_index,
+    invalidate_data,
+    selection_criteria,
+    years_sorted,
+)
+from .db import get_engine
+from .migrations import WATERMARK_COLUMN
+from .query import VERSION_QUERY, aggregate_query, data_version
+
+logger = logging.getLogger(__name__)
+
+DATA_BACKENDS = ("pandas", "sql")
+# After a failed connection the SQL backend is skipped for this long
+SQL_RETRY_SECONDS = 60
+
+_sql_unavailable_until = 0.0
+
+
+class SchemaNotMigrated(RuntimeError):
+    """The table lacks the watermark column that data versions are read from."""
+
+
+class OutbreakBackend(Protocol):
+    name: str
+
+    def invalidate(self, hard: bool = False) -> None:
+        """Make the next call see newly ingested rows."""
+
+    def years(self) -> list[int]:
+        """Years with data, most recent first."""
+
+    def categories(self) -> list[str]:
+        """Non-empty ``icd10n`` categories, sorted."""
+
+    def disease_options(self, years: list[int], category: str | None = None) -> list[str]:
+        """Diseases for the selected years and category, most frequent first."""
+
+    def aggregate(self, criteria: dict[str, Sequence | None], by: list[str]) -> pd.DataFrame:
+        """Outbreaks per ``by`` group among rows matching ``criteria``."""
+
+    def view(self, years: list[int], category: str | None = None, diseases: list[str] | None = None,
+             region: str | None = None) -> pd.DataFrame:
+        """Cube cells for a sidebar selection, stamped for ``derived``."""
+
+
+class PandasBackend:
+    """Filters and aggregates the in-memory count cube of a loaded frame."""
+    name = "pandas"
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.cube = outbreak_cube(df)
+
+    def invalidate(self, hard: bool = False) -> None:
+        invalidate_data(hard=hard)
+
+    def years(self) -> list[int]:
+        return years_sorted(self.cube)
+
+    def categories(self) -> list[str]:
+        return sorted(c for c in self.cube["icd10n"].dropna().unique().tolist() if c)
+
+    def disease_options(self, years: list[int], category: str | None = None) -> list[str]:
+        return disease_options(self.cube, years, category)
+
+    def aggregate(self, criteria: dict[str, Sequence | None], by: list[str]) -> pd.DataFrame:
+        rows = filter_index(self.cube).select(criteria)
+        frame = self.cube if rows is None else self.cube.take(rows)
+        # NULL labels form their own group, as in SQL
+        return rollup(frame, by, name=COUNT_COLUMN, dropna=False)
+
+    def view(self, years: list[int], category: str | None = None, diseases: list[str] | None = None,
+             region: str | None = None) -> pd.DataFrame:
+        return filter_df(self.cube, years, category, diseases, region)
+
+
+def _typed(frame: pd.DataFrame) -> pd.DataFrame:
+    """Give a query result the dashboard's compact dtypes; rows without a
+    year are dropped, as ``normalize`` does on load."""
+    if "year" in frame.columns:
+        frame = frame.dropna(subset=["year"])
+    dtypes = {column: COLUMN_DTYPES[column] for column in frame.columns if column in COLUMN_DTYPES}
+    return frame.astype({**dtypes, COUNT_COLUMN: "int64"})
+
+
+class SqlBackend:
+    """Runs each selection and grouping as a GROUP BY query in the database."""
+    name = "sql"
+
+    def __init__(self, engine: Engine, version_ttl: float = DATA_CACHE_TTL_SECONDS, cache_size: int = 128) -> None:
+        self.engine = engine
+        self.version_ttl = version_ttl
+        self._results = LRUCache(maxsize=cache_size)
+        self._columns: list[str] | None = None
+        self._version: str | None = None
+        self._version_read_at: float | None = None
+        self._lock = threading.Lock()
+
+    def invalidate(self, hard: bool = False) -> None:
+        with self._lock:
+            self._version_read_at = None
+        if hard:
+            self._columns = None
+            self._results.clear()
+
+    def columns(self) -> list[str]:
+        """Dashboard columns present in the table, read once it has been migrated."""
+        if self._columns is None:
+            columns = _select_columns(self.engine)
+            if WATERMARK_COLUMN not in columns:
+                raise SchemaNotMigrated(f"outbreaks.{WATERMARK_COLUMN} is missing; run `python -m app.migrations`")
+            self._columns = columns
+        return self._columns
+
+    def version(self) -> str:
+        """The table's data version, re-read at most every ``version_ttl`` seconds."""
+        with self._lock:
+            now = time.monotonic()
+            if self._version_read_at is None or now - self._version_read_at > self.version_ttl:
+                with self.engine.connect() as conn:
+                    self._version = data_version(conn.execute(VERSION_QUERY).one())
+                self._version_read_at = now
+            return self._version
+
+    def aggregate(self, criteria: dict[str, Sequence | None], by: list[str]) -> pd.DataFrame:
+        """Results are cached per data version and shared by every session;
+        treat them as read-only."""
+        criteria = {column: values for column, values in criteria.items() if values is not None}
+        version = self.version()
+        key = (version, tuple(by), tuple(sorted(
+            (column, tuple(sorted(map(str, values)))) for column, values in criteria.items()
+        )))
+
+        def build() -> pd.DataFrame:
+            statement, params = aggregate_query(criteria, by)
+            with self.engine.connect() as conn:
+                frame = _typed(pd.read_sql_query(statement, conn, params=params))
+            frame.attrs["dataset_version"] = f"sql@{version}"
+            frame.attrs["selection"] = key[1:]
+            return frame
+
+        return self._results.get_or_build(key, build)
+
+    def years(self) -> list[int]:
+        return sorted(self.aggregate({}, ["year"])["year"].tolist(), reverse=True)
+
+    def categories(self) -> list[str]:
+        return sorted(c for c in self.aggregate({}, ["icd10n"])["icd10n"].dropna().tolist() if c)
+
+    def disease_options(self, years: list[int], category: str | None = None) -> list[str]:
+        counts = self.aggregate(selection_criteria(self.columns(), years, category), ["disease"])
+        counts = counts.dropna(subset=["disease"]).sort_values(COUNT_COLUMN, ascending=False, kind="stable")
+        return counts["disease"].astype(str).tolist()
+
+    def view(self, years: list[int], category: str | None = None, diseases: list[str] | None = None,
+             region: str | None = None) -> pd.DataFrame:
+        if set(years) >= set(self.years()):
+            years = None  # every year: no need to send the list
+        columns = self.columns()
+        criteria = selection_criteria(columns, years, category, diseases, region)
+        return self.aggregate(criteria, [column for column in CUBE_DIMENSIONS if column in columns])
+
+
+@lru_cache(maxsize=1)
+def sql_backend() -> SqlBackend:
+    """The process-wide SQL backend on the dashboard's engine."""
+    return SqlBackend(get_engine())
+
+
+def data_backend(load_frame: Callable[[], pd.DataFrame]) -> OutbreakBackend:
+    """The backend selected by ``DATA_BACKEND``.
+
+    The SQL backend falls back to a pandas backend over ``load_frame()``
+    (which itself falls back to the snapshot or CSV) when the database is
+    unreachable or not migrated yet, and is retried after
+    ``SQL_RETRY_SECONDS``.
+    """
+    global _sql_unavailable_until
+    if DATA_BACKEND not in DATA_BACKENDS:
+        raise ValueError(f"Unknown DATA_BACKEND {DATA_BACKEND!r}; expected one of {DATA_BACKENDS}")
+    if DATA_BACKEND == "sql" and time.monotonic() >= _sql_unavailable_until:
+        backend = sql_backend()
+        try:
+            # columns() checks for the watermark column the version query reads
+            backend.columns()
+            backend.version()
+        except (SQLAlchemyError, OSError, SchemaNotMigrated) as e:
+            logger.warning("SQL backend unavailable, filtering in pandas: %s", e)
+            _sql_unavailable_until = time.monotonic() + SQL_RETRY_SECONDS
+        else:
+            st.session_state.data_source = "database"
+            if st.session_state.get("refresh_data", False):
+                st.session_state.refresh_data = False
+                st.toast("Data refreshed successfully from database!")
+            return backend
+    return PandasBackend(load_frame())
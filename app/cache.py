@@ -0,0 +1,181 @@
+"""Process-wide dataset cache shared by every Streamlit session."""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import pandas as pd
+
+
+@dataclass
+class CacheEntry:
+    """A loaded dataset together with the state needed to refresh it."""
+    frame: pd.DataFrame
+    source: str
+    watermark: int | None = None
+    version: str = ""
+    loaded_at: float = field(default_factory=time.monotonic)
+    token: int = 0
+
+
+# Structures derived from a dataset version (indexes, aggregates), most recent last
+DERIVED_CACHE_SIZE = 16
+_derived: OrderedDict[tuple, Any] = OrderedDict()
+_derived_lock = threading.Lock()
+
+
+def derived(df: pd.DataFrame, name: str, builder: Callable[[pd.DataFrame], Any]) -> Any:
+    """Memoize ``builder(df)`` per dataset version.
+
+    The key is the ``dataset_version`` stamped on frames loaded through the
+    shared cache, plus the ``selection`` stamped on filtered views and the
+    frame length, so a filtered view never reuses another view's or the
+    full frame's result. Frames without a version are built every time.
+    """
+    version = df.attrs.get("dataset_version")
+    if not version:
+        return builder(df)
+    key = (version, df.attrs.get("selection"), len(df), name)
+    with _derived_lock:
+        if key in _derived:
+            _derived.move_to_end(key)
+            return _derived[key]
+    value = builder(df)
+    with _derived_lock:
+        _derived[key] = value
+        while len(_derived) > DERIVED_CACHE_SIZE:
+            _derived.popitem(last=False)
+    return value
+
+
+class LRUCache:
+    """Bounded, thread-safe memo table with hit, miss and build-time counters.
+
+    Values are built outside the lock, so two threads missing the same key
+    at once may both build it; the last one stored wins.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self._items: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get_or_build(self, key: Any, builder: Callable[[], Any]) -> Any:
+        """Return the value cached under ``key``, calling ``builder()`` on a miss."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        started = time.perf_counter()
+        value = builder()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.build_seconds += elapsed
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict[str, float]:
+        """Entry count, hits, misses, hit rate and mean build time (seconds)."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "mean_build_seconds": self.build_seconds / self.misses if self.misses else 0.0,
+        }
+
+
+class SharedFrameCache:
+    """Thread-safe frame cache with a TTL and explicit invalidation tokens.
+
+    Entries are keyed by data source. An entry is served while it is younger
+    than ``ttl`` seconds and its token matches the key's current invalidation
+    token; ``invalidate`` bumps the token so every session reloads on its
+    next access. Concurrent misses on the same key are coalesced: one caller
+    runs the loader while the others wait and reuse its result.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[str, CacheEntry] = {}
+        self._tokens: dict[str, int] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._versions = itertools.count(1)
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.token != self._tokens.get(key, 0):
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl:
+            return None
+        return entry
+
+    def invalidate(self, key: str, hard: bool = False) -> None:
+        """Mark ``key`` stale; a hard invalidation also drops the entry so the
+        next load starts from scratch instead of refreshing incrementally."""
+        with self._guard:
+            self._tokens[key] = self._tokens.get(key, 0) + 1
+            if hard:
+                self._entries.pop(key, None)
+
+    def get_or_load(self, key: str, loader: Callable[[CacheEntry | None], CacheEntry]) -> CacheEntry:
+        """Return the fresh entry for ``key``, loading it at most once at a time.
+
+        ``loader`` receives the previous (stale) entry, if any, so it can
+        refresh incrementally, and returns the new entry.
+        """
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+        with self._lock_for(key):
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry
+            return self._load(key, loader)
+
+    def refresh(self, key: str, loader: Callable[[CacheEntry | None], CacheEntry]) -> CacheEntry:
+        """Reload ``key`` in place while readers keep getting the current entry.
+
+        Used for background revalidation: unlike an invalidation, sessions are
+        not blocked while the loader runs.
+        """
+        with self._lock_for(key):
+            return self._load(key, loader)
+
+    def _load(self, key: str, loader: Callable[[CacheEntry | None], CacheEntry]) -> CacheEntry:
+        token = self._tokens.get(key, 0)
+        previous = self._entries.get(key)
+        entry = loader(previous)
+        if previous is not None and entry.frame is previous.frame:
+            entry.version = previous.version
+        else:
+            entry.version = f"{key}@{next(self._versions)}"
+            entry.frame.attrs["dataset_version"] = entry.version
+        entry.token = token
+        entry.loaded_at = time.monotonic()
+        self._entries[key] = entry
+        return entry
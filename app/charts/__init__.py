@@ -2,10 +2,10 @@
 from .choropleth import choropleth
 from .insights import insights
 from .heatmap import create_heatmap, generate_sample_coordinates
-from .isoline import create_isoline_chart
+from .isoline import create_contour_chart, create_isoline_chart, create_surface_chart
 from .page import heatmap_and_isoline_page
 
 __all__ = [
 	'choropleth', 'insights', 'create_heatmap', 'generate_sample_coordinates',
-	'create_isoline_chart', 'heatmap_and_isoline_page'
+	'create_isoline_chart', 'create_contour_chart', 'create_surface_chart', 'heatmap_and_isoline_page'
 ]
@@ -1,62 +1,190 @@
 from __future__ import annotations
 
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
+
+from app.cache import derived
+from app.cube import rollup
+from app.metrics import span, timed
+from .figures import FigureCache, colorscale
+
+# Map scope per region filter; Nigeria zooms in on its own bounds
+CHOROPLETH_SCOPES = {
+    "Nigeria": {"scope": "africa", "fitbounds": True},
+    "Africa": {"scope": "africa", "fitbounds": False},
+    "Global": {"scope": "world", "fitbounds": False},
+}
+
+CHOROPLETH_MODES = ("Total", "By year", "Cumulative")
+
+# Serialized figures keyed by (counts hash, region[, mode]); the color scale is restyled
+_figures = FigureCache(maxsize=64)
+
+
+@dataclass(frozen=True)
+class YearFrames:
+    """Outbreaks per year (rows) and location (columns) for the animated map."""
+    years: np.ndarray
+    iso3: np.ndarray
+    countries: np.ndarray
+    counts: np.ndarray
+
+    def cumulative(self) -> np.ndarray:
+        return self.counts.cumsum(axis=0)
+
+
+def geo_outbreaks(df_view: pd.DataFrame) -> pd.DataFrame:
+    """Outbreaks per iso3/country, memoized per dataset version and filter state."""
+    return derived(df_view, "geo_outbreaks", lambda frame: rollup(frame, ["iso3", "country"]))
+
+
+def counts_key(geo: pd.DataFrame) -> str:
+    """Content hash of the aggregated counts."""
+    hashed = pd.util.hash_pandas_object(geo, index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def build_choropleth(geo: pd.DataFrame, color_scale: str | None = None, region_filter: str = "Global") -> go.Figure:
+    scope = CHOROPLETH_SCOPES.get(region_filter, CHOROPLETH_SCOPES["Global"])
+    fig = px.choropleth(
+        geo,
+        locations="iso3",
+        color="Outbreaks",
+        hover_name="country",
+        color_continuous_scale=color_scale,
+        projection="natural earth",
+        title=None,
+        scope=scope["scope"],
+    )
+    if scope["fitbounds"]:
+        fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+    return fig
+
+
+def year_frames(df_view: pd.DataFrame) -> YearFrames:
+    """Per-year counts for every location in one groupby, as a dense
+    years x locations matrix. Memoized per dataset version and filter state."""
+    def build(frame: pd.DataFrame) -> YearFrames:
+        cells = rollup(frame, ["year", "iso3", "country"])
+        years, year_idx = np.unique(cells["year"].to_numpy(), return_inverse=True)
+        location_idx, iso3 = pd.factorize(cells["iso3"], sort=True)
+        counts = np.zeros((len(years), len(iso3)), dtype=np.int64)
+        np.add.at(counts, (year_idx, location_idx), cells["Outbreaks"].to_numpy())
+        # Hover label: the first country name recorded for each code
+        first = pd.Series(location_idx).drop_duplicates()
+        countries = np.empty(len(iso3), dtype=object)
+        countries[first.to_numpy()] = cells["country"].astype(object).to_numpy()[first.index]
+        return YearFrames(years=years, iso3=np.asarray(iso3, dtype=object), countries=countries, counts=counts)
+
+    return derived(df_view, "year_frames", build)
+
+
+def build_animated_choropleth(frames: YearFrames, region_filter: str = "Global", cumulative: bool = False) -> go.Figure:
+    """One Plotly animation with a frame per year, a play button and a year
+    slider; scrubbing happens in the browser without reruns."""
+    scope = CHOROPLETH_SCOPES.get(region_filter, CHOROPLETH_SCOPES["Global"])
+    counts = frames.cumulative() if cumulative else frames.counts
+    labels = [str(year) for year in frames.years]
+    fig = go.Figure(
+        data=[go.Choropleth(
+            locations=frames.iso3,
+            z=counts[0],
+            text=frames.countries,
+            coloraxis="coloraxis",
+            hovertemplate="<b>%{text}</b><br>Outbreaks: %{z}<extra></extra>",
+        )],
+        frames=[go.Frame(name=label, data=[go.Choropleth(z=row)]) for label, row in zip(labels, counts)],
+    )
+    # A fixed color range keeps years comparable
+    fig.update_layout(
+        coloraxis=dict(cmin=0, cmax=max(int(counts.max()), 1), colorbar=dict(title=dict(text="Outbreaks"))),
+        margin=dict(l=0, r=0, t=0, b=0),
+        updatemenus=[dict(
+            type="buttons", direction="left", x=0.0, y=0.0, xanchor="left", yanchor="top",
+            pad=dict(t=40, r=10), showactive=False,
+            buttons=[
+                dict(label="Play", method="animate",
+                     args=[None, dict(frame=dict(duration=600, redraw=True), fromcurrent=True,
+                                      transition=dict(duration=0))]),
+                dict(label="Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ],
+        )],
+        sliders=[dict(
+            active=0, x=0.1, y=0.0, len=0.9, pad=dict(t=30),
+            currentvalue=dict(prefix="Year: " if not cumulative else "Through: "),
+            steps=[dict(label=label, method="animate",
+                        args=[[label], dict(frame=dict(duration=0, redraw=True), mode="immediate",
+                                            transition=dict(duration=0))])
+                   for label in labels],
+        )],
+    )
+    fig.update_geos(projection_type="natural earth", scope=scope["scope"])
+    if scope["fitbounds"]:
+        fig.update_geos(fitbounds="locations", visible=False)
+    return fig
+
+
+@timed("choropleth.animation_figure")
+def animated_choropleth_figure(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global",
+                               cumulative: bool = False) -> go.Figure:
+    """The animated choropleth for ``df_view``, cached like ``choropleth_figure``."""
+    frames = year_frames(df_view)
+    key = (
+        hashlib.blake2b(frames.counts.tobytes() + frames.years.tobytes() + "|".join(frames.iso3).encode(),
+                        digest_size=16).hexdigest(),
+        region_filter,
+        "cumulative" if cumulative else "by year",
+    )
+    fig = _figures.get(key, lambda: build_animated_choropleth(frames, region_filter, cumulative))
+    fig.update_layout(coloraxis_colorscale=colorscale(color_scale))
+    return fig
+
+
+@timed("choropleth.figure")
+def choropleth_figure(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global") -> go.Figure:
+    """The choropleth for ``df_view``, rebuilt only when its counts or region
+    change; a new color scale restyles the cached figure."""
+    geo = geo_outbreaks(df_view)
+    fig = _figures.get((counts_key(geo), region_filter), lambda: build_choropleth(geo, None, region_filter))
+    fig.update_layout(coloraxis_colorscale=colorscale(color_scale))
+    return fig
+
+
+def figure_cache_stats() -> dict[str, float]:
+    """Hit/miss counts and mean build time of the choropleth figure cache."""
+    return _figures.stats()
 
 
 def choropleth(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global") -> None:
     if df_view.empty:
         st.info("No records match the current filters.")
         return
-    
-    geo = (
-        df_view.groupby(["iso3", "country"], dropna=True)
-        .size()
-        .reset_index(name="Outbreaks")
-    )
-    
-    # Configure map scope based on region
-    if region_filter == "Nigeria":
-        # Focus on Nigeria
-        fig = px.choropleth(
-            geo,
-            locations="iso3",
-            color="Outbreaks",
-            hover_name="country",
-            color_continuous_scale=color_scale,
-            projection="natural earth",
-            title=None,
-            scope="africa"  # Use Africa scope to better show Nigeria
-        )
-        # Further zoom into Nigeria region
-        fig.update_geos(
-            fitbounds="locations",
-            visible=False
-        )
-    elif region_filter == "Africa":
-        # Focus on Africa
-        fig = px.choropleth(
-            geo,
-            locations="iso3",
-            color="Outbreaks",
-            hover_name="country",
-            color_continuous_scale=color_scale,
-            projection="natural earth",
-            title=None,
-            scope="africa"
-        )
+    _choropleth_view(df_view, color_scale, region_filter)
+
+
+@st.fragment
+def _choropleth_view(df_view: pd.DataFrame, color_scale: str, region_filter: str) -> None:
+    """The map and its mode toggle; changing the mode reruns only this fragment."""
+    mode = st.segmented_control(
+        "Map mode", CHOROPLETH_MODES, default=CHOROPLETH_MODES[0], key="choropleth_mode",
+        help="Total over the selected years, or an animation stepping through them",
+    ) or CHOROPLETH_MODES[0]
+    if mode == "Total":
+        fig = choropleth_figure(df_view, color_scale, region_filter)
     else:
-        # Global view
-        fig = px.choropleth(
-            geo,
-            locations="iso3",
-            color="Outbreaks",
-            hover_name="country",
-            color_continuous_scale=color_scale,
-            projection="natural earth",
-            title=None,
-        )
-    
-    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
-    st.plotly_chart(fig, use_container_width=True)
+        fig = animated_choropleth_figure(df_view, color_scale, region_filter, cumulative=mode == "Cumulative")
+    with span("choropleth.render"):
+        st.plotly_chart(fig, use_container_width=True)
+    stats = figure_cache_stats()
+    st.caption(
+        f"Figure cache: {stats['hits']:,} hits / {stats['misses']:,} misses "
+        f"({stats['hit_rate']:.0%}) · mean build {stats['mean_build_seconds'] * 1000:,.0f} ms"
+    )
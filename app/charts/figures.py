@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Callable, Hashable
+
+import plotly.colors
+import plotly.graph_objects as go
+
+from app.cache import LRUCache
+
+
+class FigureCache:
+    """Serialized Plotly figures keyed by the data they show.
+
+    Keys should not include styling such as the color scale: callers restyle
+    the returned figure instead, so a theme change reuses the cached figure.
+    Each call returns a fresh figure that the caller may modify.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._specs = LRUCache(maxsize=maxsize)
+
+    def get(self, key: Hashable, builder: Callable[[], go.Figure]) -> go.Figure:
+        return self.get_sized(key, builder)[0]
+
+    def get_sized(self, key: Hashable, builder: Callable[[], go.Figure]) -> tuple[go.Figure, int]:
+        """Like ``get``, plus the size in bytes of the cached spec (the figure
+        JSON before any restyling), measured once when it was built."""
+        spec, size = self._specs.get_or_build(key, lambda: _serialize(builder()))
+        # The spec came from a validated figure, so skip plotly's per-property validation
+        return go.Figure(json.loads(spec), _validate=False), size
+
+    def stats(self) -> dict[str, float]:
+        """Hit/miss counts and mean build time."""
+        return self._specs.stats()
+
+
+def _serialize(fig: go.Figure) -> tuple[str, int]:
+    spec = fig.to_json()
+    return spec, len(spec.encode())
+
+
+@lru_cache(maxsize=None)
+def colorscale(name: str) -> list:
+    """Resolve a named color scale to explicit stops.
+
+    Figures from ``FigureCache`` skip validation, which is what normally
+    expands names that Plotly.js does not know itself (e.g. "Plasma").
+    """
+    return plotly.colors.get_colorscale(name)
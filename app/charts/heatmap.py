@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 import pandas as pd
 import streamlit as st
 import numpy as np
@@ -7,99 +9,216 @@ import plotly.graph_objects as go
 from pathlib import Path
 from scipy.interpolate import griddata
 
+from app.config import HEATMAP_MODE
+from app.cube import rollup
+from app.gazetteer import GAZETTEER_FIELDS, gazetteer
+from app.metrics import span, timed
+from app.surface import points_key
+from .figures import FigureCache, colorscale
+
+
+MAX_POINTS_PER_COUNTRY = 5
+JITTER_DEGREES = 1.5
+MIN_JITTER_DEGREES = 0.05
+INTENSITY_NOISE = 0.2
+
+# Map centre and zoom per region filter
+HEATMAP_VIEWS = {
+    "Nigeria": (9.0820, 8.6753, 5.5),
+    "Africa": (0, 20, 2.5),
+    "Global": (20, 0, 1.5),
+}
+# Binned density cells span this many screen pixels at the region's zoom
+HEATMAP_CELL_PIXELS = 8
+# "auto" bins above this many points. Real data yields at most
+# MAX_POINTS_PER_COUNTRY per gazetteer entry (about 1,200 worldwide); from
+# a few hundred points binning trims a quarter or more of the figure payload.
+HEATMAP_BIN_MIN_POINTS = 250
+MAX_OVERLAY_POINTS = 500
+
+_figures = FigureCache(maxsize=16)
+
+
+def geo_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Outbreak counts per country, keyed by ISO3 code when the data has one.
+
+    Rows with a missing code are kept so they show up as gazetteer misses.
+    """
+    by = [column for column in ("iso3", "country") if column in df.columns]
+    return rollup(df, by, dropna=False)
+
+
+@timed("sample_coordinates")
+def generate_sample_coordinates(df: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
+    """Generate sample coordinates for countries that don't have lat/lon data.
+
+    Countries are placed with the bundled gazetteer, by ``iso3`` code when the
+    frame has one and by ``country`` name otherwise. Each country gets up to
+    ``MAX_POINTS_PER_COUNTRY`` points jittered around its centroid, scaled to
+    its bounding box so small countries stay in place, drawn from a local
+    generator seeded with ``seed`` so the global NumPy RNG is untouched.
+    Results are memoized on the input counts, so the heatmap and isoline
+    charts share one set of points; treat the returned frame as read-only.
+    """
+    iso3 = tuple(df['iso3'].astype(object)) if 'iso3' in df.columns else None
+    countries = tuple(df['country'].astype(object)) if 'country' in df.columns else None
+    outbreaks = tuple(df['Outbreaks'].astype(int)) if 'Outbreaks' in df.columns else (1,) * len(df)
+    return _sample_coordinates(iso3, countries, outbreaks, seed)
+
+
+@lru_cache(maxsize=32)
+def _sample_coordinates(
+    iso3: tuple[str, ...] | None,
+    countries: tuple[str, ...] | None,
+    outbreaks: tuple[int, ...],
+    seed: int,
+) -> pd.DataFrame:
+    places = gazetteer()
+    iso3_keys = pd.Series(iso3, dtype="category") if iso3 is not None else None
+    name_keys = pd.Series(countries, dtype="category") if countries is not None else None
+    if iso3_keys is not None:
+        coords = places.lookup(iso3_keys)
+    else:
+        coords = np.full((len(outbreaks), len(GAZETTEER_FIELDS)), np.nan)
+    unresolved = np.isnan(coords[:, 0])
+    if name_keys is not None and unresolved.any():
+        coords[unresolved] = places.lookup(name_keys[unresolved], by="name")
+        unresolved = np.isnan(coords[:, 0])
+    if unresolved.any():
+        places.record_misses((iso3_keys if iso3_keys is not None else name_keys)[unresolved])
+
+    labels = name_keys.astype(object) if name_keys is not None else iso3_keys.astype(object)
+    if iso3_keys is not None:
+        labels = labels.fillna(iso3_keys.astype(object))
+    lat, lon, min_lon, min_lat, max_lon, max_lat = coords.T
+    jitter = np.clip(np.minimum(max_lon - min_lon, max_lat - min_lat) / 4, MIN_JITTER_DEGREES, JITTER_DEGREES)
+
+    known = ~unresolved
+    counts = np.asarray(outbreaks, dtype=float)[known]
+    repeats = np.clip(counts, 0, MAX_POINTS_PER_COUNTRY).astype(int)
+    idx = np.repeat(np.flatnonzero(known), repeats)
+    point_counts = np.repeat(counts, repeats)
+
+    noise = np.random.default_rng(seed).normal(size=(len(idx), 3))
+    intensity = point_counts + noise[:, 2] * point_counts * INTENSITY_NOISE
+    return pd.DataFrame({
+        'country': labels.to_numpy()[idx],
+        'lat': lat[idx] + noise[:, 0] * jitter[idx],
+        'lon': lon[idx] + noise[:, 1] * jitter[idx],
+        'intensity': np.maximum(intensity, 0.1),
+    })
+
 
-def generate_sample_coordinates(df: pd.DataFrame) -> pd.DataFrame:
-    """Generate sample coordinates for countries that don't have lat/lon data."""
-    country_coords = {
-        'Nigeria': {'lat': 9.0820, 'lon': 8.6753},
-        'Ghana': {'lat': 7.9465, 'lon': -1.0232},
-        'Kenya': {'lat': -0.0236, 'lon': 37.9062},
-        'South Africa': {'lat': -30.5595, 'lon': 22.9375},
-        'Ethiopia': {'lat': 9.1450, 'lon': 40.4897},
-        'Uganda': {'lat': 1.3733, 'lon': 32.2903},
-        'Tanzania': {'lat': -6.3690, 'lon': 34.8888},
-        'Democratic Republic of the Congo': {'lat': -4.0383, 'lon': 21.7587},
-        'Cameroon': {'lat': 7.3697, 'lon': 12.3547},
-        'Mali': {'lat': 17.5707, 'lon': -3.9962},
-        'Burkina Faso': {'lat': 12.2383, 'lon': -1.5616},
-        'Niger': {'lat': 17.6078, 'lon': 8.0817},
-        'Chad': {'lat': 15.4542, 'lon': 18.7322},
-        'Sudan': {'lat': 12.8628, 'lon': 30.2176},
-        'Angola': {'lat': -11.2027, 'lon': 17.8739},
-        'Madagascar': {'lat': -18.7669, 'lon': 46.8691},
-        'Mozambique': {'lat': -18.6657, 'lon': 35.5296},
-        'Zambia': {'lat': -13.1339, 'lon': 27.8493},
-        'Zimbabwe': {'lat': -19.0154, 'lon': 29.1549},
-        'Botswana': {'lat': -22.3285, 'lon': 24.6849}
-    }
-
-    np.random.seed(42)
-    result_data = []
-    for _, row in df.iterrows():
-        country = row['country']
-        outbreaks = row.get('Outbreaks', 1)
-        if country in country_coords:
-            base_lat = country_coords[country]['lat']
-            base_lon = country_coords[country]['lon']
-            for i in range(min(outbreaks, 5)):
-                lat = base_lat + np.random.normal(0, 1.5)
-                lon = base_lon + np.random.normal(0, 1.5)
-                intensity = outbreaks + np.random.normal(0, outbreaks * 0.2)
-                result_data.append({
-                    'country': country,
-                    'lat': lat,
-                    'lon': lon,
-                    'intensity': max(intensity, 0.1)
-                })
-    return pd.DataFrame(result_data)
-
-
-def create_heatmap(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global") -> None:
-    """Create a density heatmap of outbreak occurrences."""
+def bin_points(lat: np.ndarray, lon: np.ndarray, weights: np.ndarray, cell_degrees: float) -> pd.DataFrame:
+    """Sum ``weights`` on a square lat/lon grid, returning only non-empty cells
+    as ``lat``/``lon`` (cell centres) and ``intensity``."""
+    rows = np.floor(np.asarray(lat) / cell_degrees).astype(np.int64)
+    cols = np.floor(np.asarray(lon) / cell_degrees).astype(np.int64)
+    # One integer key per cell so np.unique sorts a flat array
+    row0, col0 = rows.min(), cols.min()
+    width = cols.max() - col0 + 1
+    keys, inverse = np.unique((rows - row0) * width + (cols - col0), return_inverse=True)
+    totals = np.bincount(inverse, weights=weights, minlength=len(keys))
+    cell_rows, cell_cols = np.divmod(keys, width)
+    return pd.DataFrame({
+        'lat': (cell_rows + row0 + 0.5) * cell_degrees,
+        'lon': (cell_cols + col0 + 0.5) * cell_degrees,
+        'intensity': totals,
+    })
+
+
+def heatmap_cell_degrees(zoom: float) -> float:
+    """Grid cell size that spans ``HEATMAP_CELL_PIXELS`` screen pixels at ``zoom``."""
+    return 360 / (256 * 2 ** zoom) * HEATMAP_CELL_PIXELS
+
+
+def overlay_points(coord_data: pd.DataFrame, limit: int = MAX_OVERLAY_POINTS) -> pd.DataFrame:
+    """The ``limit`` most intense points, for the marker overlay."""
+    if len(coord_data) <= limit:
+        return coord_data
+    return coord_data.nlargest(limit, 'intensity')
+
+
+@timed("heatmap.figure")
+def heatmap_figure(coord_data: pd.DataFrame, color_scale: str, region_filter: str = "Global",
+                   mode: str = HEATMAP_MODE) -> tuple[go.Figure, str]:
+    """The density map for ``coord_data`` and a caption describing its payload.
+
+    The figure is cached per point set, region and mode; a new color scale
+    restyles the cached figure.
+    """
+    center_lat, center_lon, zoom = HEATMAP_VIEWS.get(region_filter, HEATMAP_VIEWS["Global"])
+    if mode == "auto":
+        mode = "binned" if len(coord_data) > HEATMAP_BIN_MIN_POINTS else "points"
+    points = np.column_stack((coord_data['lat'], coord_data['lon']))
+    key = (points_key(points, coord_data['intensity']), region_filter, mode)
+
+    def build() -> go.Figure:
+        if mode == "binned":
+            density = bin_points(coord_data['lat'], coord_data['lon'], coord_data['intensity'],
+                                 heatmap_cell_degrees(zoom))
+        else:
+            density = coord_data
+        markers = overlay_points(coord_data)
+        fig = go.Figure()
+        fig.add_trace(go.Densitymapbox(
+            lat=density['lat'],
+            lon=density['lon'],
+            z=density['intensity'],
+            radius=40,
+            showscale=True,
+            hovertemplate='<b>Density: %{z:.1f}</b><br>Lat: %{lat}<br>Lon: %{lon}<extra></extra>',
+            colorbar=dict(
+                title=dict(text="Outbreak Intensity", side="right"),
+                thickness=15,
+                len=0.7
+            )
+        ))
+        fig.add_trace(go.Scattermapbox(
+            lat=markers['lat'],
+            lon=markers['lon'],
+            mode='markers',
+            marker=dict(size=8, color='white', opacity=0.8, sizemode='diameter'),
+            text=markers['country'],
+            customdata=markers['intensity'],
+            hovertemplate='<b>%{text}</b><br>Intensity: %{customdata:.1f}<extra></extra>',
+            showlegend=False
+        ))
+        fig.update_layout(
+            mapbox=dict(style="carto-positron", center=dict(lat=center_lat, lon=center_lon), zoom=zoom),
+            margin=dict(l=0, r=0, t=40, b=0), height=600,
+            title=dict(text="Disease Outbreak Density Heatmap", x=0.5, font=dict(size=18, color="#2c3e50"))
+        )
+        return fig
+
+    fig, payload_bytes = _figures.get_sized(key, build)
+    fig.update_traces(colorscale=colorscale(color_scale), selector=dict(type="densitymapbox"))
+    density_count = len(fig.data[0].lat)
+    caption = (
+        f"{len(coord_data):,} points → {density_count:,} density {'cells' if mode == 'binned' else 'points'}, "
+        f"{len(fig.data[1].lat):,} markers · figure payload {payload_bytes / 1024:,.1f} KiB"
+    )
+    return fig, caption
+
+
+def create_heatmap(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global",
+                   mode: str = HEATMAP_MODE) -> None:
+    """Create a density heatmap of outbreak occurrences.
+
+    ``mode="binned"`` sums the points on the server into grid cells sized for
+    the region's zoom and ships only the non-empty cells; ``"points"`` sends
+    every point for the browser to smooth; ``"auto"`` bins above
+    ``HEATMAP_BIN_MIN_POINTS`` points. The marker overlay is capped at
+    ``MAX_OVERLAY_POINTS`` either way.
+    """
     if df_view.empty:
         st.info("No records match the current filters.")
         return
-    geo_data = df_view.groupby(["country"], dropna=True).size().reset_index(name="Outbreaks")
-    coord_data = generate_sample_coordinates(geo_data)
+    coord_data = generate_sample_coordinates(geo_counts(df_view))
     if coord_data.empty:
         st.info("No coordinate data available for heatmap visualization.")
         return
-    fig = go.Figure()
-    fig.add_trace(go.Densitymapbox(
-        lat=coord_data['lat'],
-        lon=coord_data['lon'],
-        z=coord_data['intensity'],
-        radius=40,
-        colorscale=color_scale,
-        showscale=True,
-        hovertemplate='<b>Density: %{z:.1f}</b><br>Lat: %{lat}<br>Lon: %{lon}<extra></extra>',
-        colorbar=dict(
-            title=dict(text="Outbreak Intensity", side="right"),
-            thickness=15,
-            len=0.7
-        )
-    ))
-    fig.add_trace(go.Scattermapbox(
-        lat=coord_data['lat'],
-        lon=coord_data['lon'],
-        mode='markers',
-        marker=dict(size=8, color='white', opacity=0.8, sizemode='diameter'),
-        text=coord_data['country'],
-        hovertemplate='<b>%{text}</b><br>Intensity: %{marker.color:.1f}<extra></extra>',
-        showlegend=False
-    ))
-    if region_filter == "Nigeria":
-        center_lat, center_lon = 9.0820, 8.6753
-        zoom = 5.5
-    elif region_filter == "Africa":
-        center_lat, center_lon = 0, 20
-        zoom = 2.5
-    else:
-        center_lat, center_lon = 20, 0
-        zoom = 1.5
-    fig.update_layout(
-        mapbox=dict(style="carto-positron", center=dict(lat=center_lat, lon=center_lon), zoom=zoom),
-        margin=dict(l=0, r=0, t=40, b=0), height=600,
-        title=dict(text="Disease Outbreak Density Heatmap", x=0.5, font=dict(size=18, color="#2c3e50"))
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    fig, caption = heatmap_figure(coord_data, color_scale, region_filter, mode)
+    with span("heatmap.render"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(caption)
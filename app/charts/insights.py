@@ -1,68 +1,131 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 import altair as alt
 
+from app.cache import derived
+from app.config import INSIGHTS_TOP_N
+from app.cube import COUNT_COLUMN
+from app.metrics import span, timed
+
+TOP_DISEASES = 10
+TOP_COUNTRIES = 10
+OTHER_LABEL = "Other"
+
+
+@dataclass(frozen=True)
+class InsightSummaries:
+    """The four aggregates behind the insights page."""
+    by_year: pd.DataFrame
+    top_diseases: pd.DataFrame
+    all_diseases: pd.DataFrame
+    top_countries: pd.DataFrame
+
+
+def _counts(series: pd.Series, weights: np.ndarray | None) -> pd.Series:
+    """Outbreaks per observed value, from one bincount over the column's codes."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, labels = pd.factorize(series)
+    present = codes >= 0
+    counts = np.bincount(
+        codes[present],
+        weights=None if weights is None else weights[present],
+        minlength=len(labels),
+    )
+    result = pd.Series(counts.astype(np.int64), index=labels)
+    return result[result > 0]
 
-def insights(df_view: pd.DataFrame, alt_base_color: str) -> None:
+
+def _frame(counts: pd.Series, label: str, value: str) -> pd.DataFrame:
+    return pd.DataFrame({label: counts.index.astype(object), value: counts.to_numpy()})
+
+
+def top_n_with_other(counts: pd.Series, n: int) -> pd.Series:
+    """The ``n`` largest counts, descending, plus the rest summed as ``"Other"``."""
+    ranked = counts.sort_values(ascending=False, kind="stable")
+    head = ranked.iloc[:n]
+    rest = ranked.iloc[n:]
+    if rest.empty:
+        return head
+    return pd.concat([pd.Series(head.to_numpy(), index=head.index.astype(object)),
+                      pd.Series([rest.sum()], index=[OTHER_LABEL])])
+
+
+@timed("insights.summarize")
+def summarize(df_view: pd.DataFrame, top_n: int = INSIGHTS_TOP_N) -> InsightSummaries:
+    """Insights aggregates for ``df_view``, memoized per dataset version and
+    filter state. Accepts cube cells or raw rows."""
+    def build(frame: pd.DataFrame) -> InsightSummaries:
+        weights = frame[COUNT_COLUMN].to_numpy() if COUNT_COLUMN in frame.columns else None
+        years = _counts(frame["year"], weights).sort_index()
+        diseases = _counts(frame["disease"], weights)
+        countries = _counts(frame["country"], weights)
+        return InsightSummaries(
+            by_year=_frame(years, "year", "Outbreaks"),
+            top_diseases=_frame(diseases.nlargest(TOP_DISEASES), "disease", "count"),
+            all_diseases=_frame(top_n_with_other(diseases, top_n), "disease", "count"),
+            top_countries=_frame(countries.nlargest(TOP_COUNTRIES), "country", "Outbreaks"),
+        )
+
+    return derived(df_view, f"insights/{top_n}", build)
+
+
+def insights(df_view: pd.DataFrame, alt_base_color: str, top_n: int = INSIGHTS_TOP_N) -> None:
     if df_view.empty:
         st.info("No records match the current filters.")
         return
 
-    # Row 1
-    r1c1, r1c2 = st.columns(2)
-    with r1c1:
-        st.caption("Outbreaks by year")
-        ts = df_view.groupby("year").size().reset_index(name="Outbreaks").sort_values("year")
-        st.altair_chart(
-            alt.Chart(ts)
-            .mark_line(point=True, color=alt_base_color)
-            .encode(x="year:O", y="Outbreaks:Q", tooltip=["year:O", "Outbreaks:Q"])  # keep ordinal for gaps
-            .properties(height=220),
-            use_container_width=True,
-        )
+    summaries = summarize(df_view, top_n)
 
-    with r1c2:
-        st.caption("Top 10 diseases ")
-        top_disease = (
-            df_view.groupby("disease").size().reset_index(name="count").sort_values("count", ascending=False).head(10)
-        )
-        st.altair_chart(
-            alt.Chart(top_disease)
-            .mark_point(filled=True, size=90, color=alt_base_color)
-            .encode(x="count:Q", y=alt.Y("disease:N", sort="-x"), tooltip=["disease:N", "count:Q"])  
-            .properties(height=220),
-            use_container_width=True,
-        )
+    # Altair serializes each chart spec here
+    with span("insights.render"):
+        # Row 1
+        r1c1, r1c2 = st.columns(2)
+        with r1c1:
+            st.caption("Outbreaks by year")
+            st.altair_chart(
+                alt.Chart(summaries.by_year)
+                .mark_line(point=True, color=alt_base_color)
+                .encode(x="year:O", y="Outbreaks:Q", tooltip=["year:O", "Outbreaks:Q"])  # keep ordinal for gaps
+                .properties(height=220),
+                use_container_width=True,
+            )
 
-    # Row 2
-    r2c1, r2c2 = st.columns(2)
-    with r2c1:
-        st.caption("All diseases")
-        all_disease = df_view.groupby("disease").size().reset_index(name="count")
-        st.altair_chart(
-            alt.Chart(all_disease)
-            .mark_bar(color=alt_base_color)
-            .encode(x=alt.X("disease:N", sort="-y"), y="count:Q", tooltip=["disease:N", "count:Q"])
-            .properties(height=360),
-            use_container_width=True,
-        )
+        with r1c2:
+            st.caption("Top 10 diseases ")
+            st.altair_chart(
+                alt.Chart(summaries.top_diseases)
+                .mark_point(filled=True, size=90, color=alt_base_color)
+                .encode(x="count:Q", y=alt.Y("disease:N", sort="-x"), tooltip=["disease:N", "count:Q"])  
+                .properties(height=220),
+                use_container_width=True,
+            )
 
-    with r2c2:
-        st.caption("Top countries")
-        if "iso3" in df_view.columns:
-            by_country = (
-                df_view.groupby(["country", "iso3"]).size().reset_index(name="Outbreaks").sort_values("Outbreaks", ascending=False).head(10)
+        # Row 2
+        r2c1, r2c2 = st.columns(2)
+        with r2c1:
+            st.caption(f"All diseases (top {top_n}, rest as {OTHER_LABEL})")
+            st.altair_chart(
+                alt.Chart(summaries.all_diseases)
+                .mark_bar(color=alt_base_color)
+                # Rows arrive ranked with "Other" last; keep that order
+                .encode(x=alt.X("disease:N", sort=None), y="count:Q", tooltip=["disease:N", "count:Q"])
+                .properties(height=360),
+                use_container_width=True,
             )
-        else:
-            by_country = (
-                df_view.groupby("country").size().reset_index(name="Outbreaks").sort_values("Outbreaks", ascending=False).head(10)
+
+        with r2c2:
+            st.caption("Top countries")
+            st.altair_chart(
+                alt.Chart(summaries.top_countries)
+                .mark_bar(color=alt_base_color)
+                .encode(x="Outbreaks:Q", y=alt.Y("country:N", sort="-x"), tooltip=["country:N", "Outbreaks:Q"])
+                .properties(height=360),
+                use_container_width=True,
             )
-        st.altair_chart(
-            alt.Chart(by_country)
-            .mark_bar(color=alt_base_color)
-            .encode(x="Outbreaks:Q", y=alt.Y("country:N", sort="-x"), tooltip=["country:N", "Outbreaks:Q"])
-            .properties(height=360),
-            use_container_width=True,
-        )
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import pandas as pd
 import streamlit as st
+from app.cube import total
 from app.charts.heatmap import create_heatmap
-from app.charts.isoline import create_isoline_chart
+from app.charts.isoline import create_contour_chart, create_surface_chart
+
+PAGE_CHARTS = ("Density map", "Contour map", "3D surface")
 
 
 def heatmap_and_isoline_page(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global") -> None:
@@ -54,7 +57,7 @@ def heatmap_and_isoline_page(df_view: pd.DataFrame, color_scale: str, region_fil
     # Key metrics row
     col1, col2, col3, col4 = st.columns(4)
     
-    total_outbreaks = len(df_view)
+    total_outbreaks = total(df_view)
     unique_countries = df_view['country'].nunique()
     unique_diseases = df_view['disease'].nunique()
     year_span = df_view['year'].max() - df_view['year'].min()
@@ -93,13 +96,23 @@ def heatmap_and_isoline_page(df_view: pd.DataFrame, color_scale: str, region_fil
     
     st.markdown("---")
     
-    # Main visualizations: stacked full-width charts
-    # Heatmap takes full width
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    create_heatmap(df_view, color_scale, region_filter)
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Isoline takes full width
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    create_isoline_chart(df_view, color_scale, region_filter)
-    st.markdown('</div>', unsafe_allow_html=True)
+    page_charts(df_view, color_scale, region_filter)
+
+
+@st.fragment
+def page_charts(df_view: pd.DataFrame, color_scale: str, region_filter: str = "Global") -> None:
+    """One tab per chart; only the open tab's chart is built.
+
+    Switching tabs reruns just this fragment, not the whole script.
+    """
+    density_tab, contour_tab, surface_tab = st.tabs(list(PAGE_CHARTS), key="heatmap_page_chart", on_change="rerun")
+    for tab, render in (
+        (density_tab, create_heatmap),
+        (contour_tab, create_contour_chart),
+        (surface_tab, create_surface_chart),
+    ):
+        if tab.open:
+            with tab:
+                st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+                render(df_view, color_scale, region_filter)
+                st.markdown('</div>', unsafe_allow_html=True)
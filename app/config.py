@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from typing import List
 from neon_api import NeonAPI
@@ -10,6 +11,7 @@ neon = NeonAPI(api_key="napi_mgvr1mz1fm3uywv7ullwl7dokpz62dyw5287ggbu8za5j04kg2c
 class Paths:
     DATA_CSV: str = "disease_outbreaks_HDX.csv"
     LOGO: str = "logo.png"
+    SNAPSHOT: str = ".cache/outbreaks.arrow"
 
 NEON_DB_CONFIG = {
     "project_id": "polished-meadow-24726115",
@@ -20,6 +22,25 @@ NEON_DB_CONFIG = {
     "table": "outbreaks"
 }
 
+# Store categorical labels as pyarrow-backed strings (requires pyarrow)
+DATA_ARROW_STRINGS = os.getenv("DATA_ARROW_STRINGS", "0") == "1"
+
+# Isoline surface engine: "interpolate", "kde" or "auto" (KDE for continental and global views)
+ISOLINE_ENGINE = os.getenv("ISOLINE_ENGINE", "auto")
+
+# Heatmap density: "points", "binned" (server-side grid cells) or "auto"
+HEATMAP_MODE = os.getenv("HEATMAP_MODE", "auto")
+
+# Diseases shown individually in the insights "All diseases" chart; the rest are "Other"
+INSIGHTS_TOP_N = int(os.getenv("INSIGHTS_TOP_N", "25"))
+
+# Dashboard query backend: "pandas" (load the table, filter in memory) or
+# "sql" (push filters and GROUP BYs down to the database)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "pandas")
+
+# Seconds a loaded dataset is shared across sessions before it is refreshed
+DATA_CACHE_TTL_SECONDS = int(os.getenv("DATA_CACHE_TTL", "600"))
+
 ALT_BASE_COLORS = {
     "Reds": "#d62728",
     "Blues": "#1f77b4",
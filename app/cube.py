@@ -0,0 +1,51 @@
+"""Materialized outbreak count cube shared by all dashboard charts."""
+from __future__ import annotations
+
+import pandas as pd
+
+from .cache import derived
+
+CUBE_DIMENSIONS = ["year", "icd10n", "disease", "iso3", "country", "unsd_region", "who_region"]
+COUNT_COLUMN = "outbreaks"
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Count outbreak rows per distinct (year, icd10n, disease, iso3, country,
+    unsd_region, who_region) cell. Label columns stay categorical."""
+    dimensions = [column for column in CUBE_DIMENSIONS if column in df.columns]
+    return (
+        df.groupby(dimensions, observed=True, dropna=False)
+        .size()
+        .reset_index(name=COUNT_COLUMN)
+    )
+
+
+def outbreak_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """The count cube for ``df``, computed once per dataset version.
+
+    The cube carries the frame's ``dataset_version``, so structures derived
+    from it (filter index, chart aggregates) are memoized too.
+    """
+    def build(frame: pd.DataFrame) -> pd.DataFrame:
+        cube = build_cube(frame)
+        cube.attrs["dataset_version"] = frame.attrs.get("dataset_version")
+        return cube
+
+    return derived(df, "cube", build)
+
+
+def rollup(frame: pd.DataFrame, by: str | list[str], name: str = "Outbreaks", dropna: bool = True) -> pd.DataFrame:
+    """Outbreak counts grouped by ``by`` as a frame with a ``name`` column.
+
+    Works on cube cells (summing their counts) as well as on raw outbreak
+    rows (counting them), so chart builders accept either. With
+    ``dropna=False`` rows with missing keys are kept as their own groups.
+    """
+    grouped = frame.groupby(by, observed=True, dropna=dropna)
+    counts = grouped[COUNT_COLUMN].sum() if COUNT_COLUMN in frame.columns else grouped.size()
+    return counts.reset_index(name=name)
+
+
+def total(frame: pd.DataFrame) -> int:
+    """Number of outbreaks represented by cube cells or raw rows."""
+    return int(frame[COUNT_COLUMN].sum()) if COUNT_COLUMN in frame.columns else len(frame)
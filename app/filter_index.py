@@ -0,0 +1,111 @@
+"""Inverted index over the filterable outbreak columns."""
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+INDEXED_COLUMNS = ("year", "icd10n", "disease", "iso3", "country", "unsd_region")
+
+
+class _Postings:
+    """Row ids grouped by value code, in ascending order within each value.
+
+    Codes are label positions plus one (0 marks missing values), and the rows
+    with code ``c`` are ``row_ids[offsets[c]:offsets[c + 1]]``.
+    """
+
+    def __init__(self, series: pd.Series) -> None:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            self.labels = series.cat.categories
+        else:
+            codes, self.labels = pd.factorize(series, sort=True)
+        # Shift by one so missing values (code -1) get their own, unused bucket
+        self.codes = codes.astype(np.int32) + 1
+        self.row_ids = np.argsort(self.codes, kind="stable").astype(np.int64)
+        counts = np.bincount(self.codes, minlength=len(self.labels) + 1)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def code_ids(self, values: Iterable) -> np.ndarray:
+        ids = self.labels.get_indexer(pd.Index(list(values)))
+        return np.unique(ids[ids >= 0]) + 1
+
+    def size(self, code_ids: np.ndarray) -> int:
+        return int((self.offsets[code_ids + 1] - self.offsets[code_ids]).sum())
+
+    def rows(self, code_ids: np.ndarray) -> np.ndarray:
+        slices = [self.row_ids[self.offsets[i]:self.offsets[i + 1]] for i in code_ids]
+        if len(slices) == 1:
+            return slices[0]
+        return np.sort(np.concatenate(slices)) if slices else np.empty(0, dtype=np.int64)
+
+    def mask(self, code_ids: np.ndarray) -> np.ndarray:
+        lookup = np.zeros(len(self.labels) + 1, dtype=bool)
+        lookup[code_ids] = True
+        return lookup
+
+
+class FilterIndex:
+    """Per-value sorted row-id arrays for year, category, disease, iso3,
+    country and region, built once per dataset version.
+
+    A selection is resolved by expanding the most selective criterion into
+    its row ids and checking the remaining criteria against the stored codes
+    of just those rows, so the cost scales with the number of matching rows
+    rather than the size of the table. Criteria that select every value are
+    skipped entirely.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.num_rows = len(df)
+        self._postings = {column: _Postings(df[column]) for column in INDEXED_COLUMNS if column in df.columns}
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._postings
+
+    def select(self, criteria: dict[str, Iterable | None]) -> np.ndarray | None:
+        """Return the ascending row positions matching every criterion.
+
+        ``criteria`` maps a column to the accepted values; ``None`` means no
+        constraint. Returns None when nothing is filtered out.
+        """
+        active = []
+        for column, values in criteria.items():
+            if values is None:
+                continue
+            postings = self._postings[column]
+            code_ids = postings.code_ids(values)
+            if len(code_ids) == len(postings.labels) and postings.offsets[1] == 0:
+                continue
+            active.append((postings.size(code_ids), postings, code_ids))
+        if not active:
+            return None
+        active.sort(key=lambda item: item[0])
+        _, postings, code_ids = active[0]
+        rows = postings.rows(code_ids)
+        for _, postings, code_ids in active[1:]:
+            if not len(rows):
+                break
+            rows = rows[postings.mask(code_ids)[postings.codes[rows]]]
+        return rows
+
+    def value_counts(
+        self,
+        column: str,
+        rows: np.ndarray | None = None,
+        weights: np.ndarray | None = None,
+    ) -> pd.Series:
+        """Counts of each observed value of ``column`` among ``rows``, descending.
+
+        ``weights`` (one per row, e.g. cube cell counts) are summed instead of
+        counting rows.
+        """
+        postings = self._postings[column]
+        codes = postings.codes if rows is None else postings.codes[rows]
+        if weights is not None and rows is not None:
+            weights = weights[rows]
+        counts = np.bincount(codes, weights=weights, minlength=len(postings.labels) + 1)[1:]
+        series = pd.Series(counts, index=postings.labels)
+        return series[series > 0].sort_values(ascending=False, kind="stable")
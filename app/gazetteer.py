@@ -0,0 +1,69 @@
+"""Bundled country gazetteer: centroid and bounding box per ISO3 code."""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = Path(__file__).parent / "assets" / "country_centroids.csv"
+GAZETTEER_FIELDS = ("lat", "lon", "min_lon", "min_lat", "max_lon", "max_lat")
+MAX_LOGGED_MISSES = 20
+
+
+class Gazetteer:
+    """Centroids and bounding boxes as one ``(countries, 6)`` float array.
+
+    Lookups align the gazetteer to a column's category labels once and then
+    index that array with the category codes, so resolving every row is a
+    single NumPy take. Keys that are not in the gazetteer resolve to NaN and
+    are counted in ``misses``.
+    """
+
+    def __init__(self, table: pd.DataFrame) -> None:
+        self.iso3 = pd.Index(table["iso3"].str.upper())
+        self.names = pd.Index(table["name"].str.casefold())
+        # Trailing NaN row: position -1 (unknown key) resolves to it
+        self.coords = np.vstack([
+            table[list(GAZETTEER_FIELDS)].to_numpy(dtype=float),
+            np.full(len(GAZETTEER_FIELDS), np.nan),
+        ])
+        self.misses: Counter[str] = Counter()
+        self._misses_lock = threading.Lock()
+
+    def lookup(self, keys: pd.Series, by: str = "iso3") -> np.ndarray:
+        """Resolve ``keys`` (ISO3 codes, or country names when ``by="name"``)
+        to a ``(len(keys), 6)`` array ordered as ``GAZETTEER_FIELDS``."""
+        if not isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.astype("category")
+        labels = keys.cat.categories.astype(str)
+        if by == "iso3":
+            positions = self.iso3.get_indexer(labels.str.upper())
+        else:
+            positions = self.names.get_indexer(labels.str.casefold())
+        # One row per category code, plus the NaN row again for missing keys (code -1)
+        aligned = self.coords[np.append(positions, -1)]
+        return aligned[keys.cat.codes.to_numpy()]
+
+    def record_misses(self, keys: pd.Series) -> None:
+        """Count rows whose ``keys`` could not be resolved; each new key is logged once."""
+        counts = keys.astype(object).fillna("<missing>").astype(str).value_counts()
+        with self._misses_lock:
+            new = [key for key in counts.index if key not in self.misses]
+            self.misses.update(counts.to_dict())
+        if new:
+            shown = ", ".join(sorted(new)[:MAX_LOGGED_MISSES])
+            more = f" (+{len(new) - MAX_LOGGED_MISSES} more)" if len(new) > MAX_LOGGED_MISSES else ""
+            logger.warning("No gazetteer entry for %d key(s): %s%s", len(new), shown, more)
+
+
+@lru_cache(maxsize=1)
+def gazetteer() -> Gazetteer:
+    """The bundled gazetteer, read on first use."""
+    return Gazetteer(pd.read_csv(GAZETTEER_PATH, keep_default_na=False))
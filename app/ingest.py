@@ -0,0 +1,339 @@
+"""Record validation, incremental parsing and bulk writes for ingestion."""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import csv
+import json
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+INGEST_COLUMNS = (
+    "year", "disease", "country", "iso3", "icd10n",
+    "unsd_region", "unsd_subregion", "who_region", "DONs",
+)
+
+# Header aliases accepted in CSV uploads (e.g. "Year", "Country" in HDX exports)
+_FIELD_ALIASES = {column.lower(): column for column in INGEST_COLUMNS}
+
+STREAM_CHUNK_ROWS = 5000
+STREAM_PREFETCH_CHUNKS = 2
+MAX_REPORTED_ERRORS = 100
+# A quoted CSV field still open after this many characters is reported as
+# unterminated; kept below csv.field_size_limit()
+MAX_CSV_RECORD_CHARS = 100_000
+
+
+# Pydantic model for an outbreak record
+class OutbreakRecord(BaseModel):
+    year: int
+    disease: str
+    country: str
+    iso3: str | None = None
+    icd10n: str | None = None
+    unsd_region: str | None = None
+    unsd_subregion: str | None = None
+    who_region: str | None = None
+    DONs: str | None = None
+
+
+class UploadParseError(ValueError):
+    """The upload body could not be decoded or parsed."""
+
+
+class PartialIngest(Exception):
+    """A stream stopped part way through; ``result`` counts the chunks already committed."""
+
+    def __init__(self, cause: Exception, result: dict[str, Any]) -> None:
+        super().__init__(str(cause))
+        self.cause = cause
+        self.result = result
+
+
+INSERT_QUERY = text(
+    """
+    INSERT INTO outbreaks
+    (year, disease, country, iso3, icd10n, unsd_region, unsd_subregion, who_region, DONs)
+    VALUES
+    (:year, :disease, :country, :iso3, :icd10n, :unsd_region, :unsd_subregion, :who_region, :DONs)
+    """
+)
+
+COPY_QUERY = f"COPY outbreaks ({', '.join(INGEST_COLUMNS)}) FROM STDIN"
+
+
+def validate_rows(rows: list[dict[str, Any]], start: int = 0) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Validate rows in a single pass, returning (valid records, per-row errors).
+
+    Error indices are offset by ``start`` so chunks of a stream report their
+    position in the whole upload.
+    """
+    valid, errors = [], []
+    for index, row in enumerate(rows, start):
+        try:
+            valid.append(OutbreakRecord(**row).dict())
+        except ValidationError as e:
+            errors.append({
+                "index": index,
+                "errors": [{"field": ".".join(map(str, err["loc"])), "message": err["msg"]} for err in e.errors()],
+            })
+    return valid, errors
+
+
+async def write_rows(conn: AsyncConnection, rows: list[dict[str, Any]]) -> None:
+    """Write validated rows, using COPY on Postgres and a multi-row INSERT elsewhere."""
+    if conn.dialect.name != "postgresql":
+        await conn.execute(INSERT_QUERY, rows)
+        return
+    raw = await conn.get_raw_connection()
+    async with raw.driver_connection.cursor() as cursor:
+        async with cursor.copy(COPY_QUERY) as copy:
+            for row in rows:
+                await copy.write_row(tuple(row[column] for column in INGEST_COLUMNS))
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering more than one line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[tuple[dict[str, Any] | None, str | None]]:
+    """Yield (record, parse error) pairs from newline-delimited JSON."""
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield None, f"Invalid JSON: {e.msg}"
+            continue
+        if isinstance(record, dict):
+            yield record, None
+        else:
+            yield None, "Record must be a JSON object"
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """Whether a CSV record is inside a quoted field at the end of ``line``.
+
+    ``quoted`` is the state at the start of the line. Only a quote opening a
+    field starts quoting, so a stray one (``12" sample``) is literal text.
+    """
+    if '"' not in line:
+        return quoted
+    field_start = not quoted
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quoted:
+            if char == '"':
+                if line[i + 1:i + 2] == '"':
+                    i += 1  # escaped quote
+                else:
+                    quoted = False
+        elif char == '"' and field_start:
+            quoted = True
+        field_start = char == "," and not quoted
+        i += 1
+    return quoted
+
+
+class _CsvRecords:
+    """Reassembles physical lines into CSV records (lists of values).
+
+    Lines are held only while a quoted field is open, and at most
+    ``MAX_CSV_RECORD_CHARS`` of them: past that the record is reported as
+    unterminated and the lines after its first are read again as records.
+    """
+
+    def __init__(self) -> None:
+        self.pending: list[str] = []
+        self.size = 0
+        self.quoted = False
+
+    def push(self, line: str) -> Iterator[tuple[list[str] | None, str | None]]:
+        backlog = deque([line])
+        while backlog:
+            line = backlog.popleft()
+            self.pending.append(line)
+            self.size += len(line) + 1
+            self.quoted = _ends_quoted(line, self.quoted)
+            if self.quoted:
+                if self.size > MAX_CSV_RECORD_CHARS:
+                    backlog.extendleft(reversed(self._reset()[1:]))
+                    yield None, f"Unterminated quoted field (over {MAX_CSV_RECORD_CHARS:,} characters)"
+                continue
+            try:
+                values = next(csv.reader(["\n".join(self._reset())]), [])
+            except csv.Error as e:
+                yield None, f"Malformed CSV row: {e}"
+                continue
+            yield values, None
+
+    def close(self) -> Iterator[tuple[list[str] | None, str | None]]:
+        while self.pending:
+            rest = self._reset()[1:]
+            yield None, "Unterminated quoted field at end of upload"
+            for line in rest:
+                yield from self.push(line)
+
+    def _reset(self) -> list[str]:
+        pending, self.pending, self.size, self.quoted = self.pending, [], 0, False
+        return pending
+
+
+async def iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[tuple[dict[str, Any] | None, str | None]]:
+    """Yield (record, parse error) pairs from CSV with a header row.
+
+    Header names are matched case-insensitively and unknown columns are
+    ignored, so raw HDX exports (including their HXL tag row) can be uploaded
+    as-is. Quoted fields spanning several lines are reassembled before parsing;
+    malformed or unterminated records are reported and parsing continues.
+    """
+    header: list[str | None] | None = None
+    reader = _CsvRecords()
+
+    async def records() -> AsyncIterator[tuple[list[str] | None, str | None]]:
+        async for line in lines:
+            for item in reader.push(line):
+                yield item
+        for item in reader.close():
+            yield item
+
+    async for values, error in records():
+        if error is not None:
+            yield None, error
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [_FIELD_ALIASES.get(value.strip().lower()) for value in values]
+            continue
+        if all(value.startswith("#") for value in values if value):
+            continue
+        if len(values) != len(header):
+            yield None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield {
+            column: (value if value != "" else None)
+            for column, value in zip(header, values)
+            if column is not None
+        }, None
+
+
+async def stream_ingest(
+    engine: AsyncEngine,
+    records: AsyncIterator[tuple[dict[str, Any] | None, str | None]],
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    on_chunk: Callable[[int], None] | None = None,
+) -> dict[str, Any]:
+    """Validate records in fixed-size chunks and write each chunk as it is ready.
+
+    A producer task parses and validates the next chunk while the current one
+    is being written, with at most ``STREAM_PREFETCH_CHUNKS`` chunks buffered,
+    so memory stays bounded by the chunk size rather than the upload size.
+    ``on_chunk`` is called with each chunk's row count before it is written
+    and may raise to abort the upload.
+
+    Each chunk is committed in its own transaction, so a long upload neither
+    holds one transaction open nor loses the rows already charged and written
+    when it fails part way; the failure is raised as ``PartialIngest``
+    carrying the totals committed so far.
+    """
+    started = time.perf_counter()
+    queue: asyncio.Queue[tuple[list[dict[str, Any]], list[dict[str, Any]], int] | None] = asyncio.Queue(
+        maxsize=STREAM_PREFETCH_CHUNKS
+    )
+
+    async def parsed() -> AsyncIterator[tuple[dict[str, Any] | None, str | None]]:
+        try:
+            async for item in records:
+                yield item
+        except UnicodeDecodeError as e:
+            raise UploadParseError(f"Upload is not valid UTF-8: {e}") from e
+        except (csv.Error, ValueError) as e:
+            raise UploadParseError(f"Upload could not be parsed: {e}") from e
+
+    async def produce() -> None:
+        try:
+            rows: list[tuple[int, dict[str, Any]]] = []
+            parse_errors: list[dict[str, Any]] = []
+            start = index = 0
+            async for record, error in parsed():
+                if error is not None:
+                    parse_errors.append({"index": index, "errors": [{"field": None, "message": error}]})
+                else:
+                    rows.append((index, record))
+                index += 1
+                if index - start >= chunk_size:
+                    await queue.put(_validate_chunk(rows, parse_errors, index - start))
+                    rows, parse_errors, start = [], [], index
+            if index > start:
+                await queue.put(_validate_chunk(rows, parse_errors, index - start))
+        finally:
+            # Once cancelled the consumer has stopped reading: a blocking put would never return
+            if not asyncio.current_task().cancelling():
+                await queue.put(None)
+
+    accepted = rejected = 0
+    errors: list[dict[str, Any]] = []
+
+    def result() -> dict[str, Any]:
+        return {
+            "accepted": accepted,
+            "rejected": rejected,
+            "errors": errors,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (chunk := await queue.get()) is not None:
+            valid, chunk_errors, size = chunk
+            if on_chunk is not None:
+                on_chunk(size)
+            if valid:
+                async with engine.begin() as conn:
+                    await write_rows(conn, valid)
+            accepted += len(valid)
+            rejected += len(chunk_errors)
+            errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+        await producer
+    except Exception as e:
+        raise PartialIngest(e, result()) from e
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
+    return result()
+
+
+def _validate_chunk(
+    rows: list[tuple[int, dict[str, Any]]],
+    parse_errors: list[dict[str, Any]],
+    size: int,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], int]:
+    valid, errors = [], list(parse_errors)
+    for index, row in rows:
+        records, row_errors = validate_rows([row], start=index)
+        valid.extend(records)
+        errors.extend(row_errors)
+    errors.sort(key=lambda error: error["index"])
+    return valid, errors, size
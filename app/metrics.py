@@ -0,0 +1,282 @@
+"""In-process timing spans, counters, gauges and histograms.
+
+Metrics live in a process-wide registry and are exported in the Prometheus
+text exposition format by ``render_prometheus`` (served by the API at
+``/metrics``). ``span`` times a block into the ``gis_stage_seconds``
+histogram; inside ``trace`` it also records the block for a per-run
+breakdown, which the dashboard's Performance panel shows for the last rerun.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    """A named metric with one series per combination of label values."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _series(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        """(name suffix, label pairs, value) for every exported sample."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self._series():
+            rendered = ",".join(f'{name}="{_escape(label)}"' for name, label in labels)
+            lines.append(f"{self.name}{suffix}{{{rendered}}} {_format_value(value)}" if rendered
+                         else f"{self.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _series(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", tuple(zip(self.labelnames, key)), value
+
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _series(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", tuple(zip(self.labelnames, key)), value
+
+
+@dataclass
+class _HistogramSeries:
+    buckets: list[int]
+    count: int = 0
+    sum: float = 0.0
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative ``le`` buckets, with their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = _HistogramSeries(buckets=[0] * (len(self.buckets) + 1))
+            # Non-cumulative per bucket; the last slot is +Inf
+            series.buckets[bisect.bisect_left(self.buckets, value)] += 1
+            series.count += 1
+            series.sum += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the wall time of the block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def summary(self) -> dict[tuple[str, ...], tuple[int, float]]:
+        """(count, sum) per label values."""
+        with self._lock:
+            return {key: (series.count, series.sum) for key, series in self._values.items()}
+
+    def _series(self):
+        with self._lock:
+            items = sorted((key, (list(series.buckets), series.count, series.sum))
+                           for key, series in self._values.items())
+        for key, (buckets, count, total) in items:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, observed in zip((*self.buckets, math.inf), buckets):
+                cumulative += observed
+                yield "_bucket", (*labels, ("le", _format_value(bound))), cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+class Registry:
+    """Metrics by name; asking for an existing name returns the same metric."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type[Metric], name: str, help: str, labelnames, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, tuple(labelnames), **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name!r} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+render_prometheus = REGISTRY.render
+
+STAGE_SECONDS = histogram("gis_stage_seconds", "Wall time spent in each instrumented stage.", ("stage",))
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    """One finished span: its stage, nesting depth, start offset within the trace and duration."""
+    stage: str
+    depth: int
+    offset: float
+    seconds: float
+
+
+@dataclass
+class Trace:
+    """Spans finished during one run, e.g. one Streamlit rerun."""
+    started: float = field(default_factory=time.perf_counter)
+    seconds: float | None = None
+    spans: list[SpanRecord] = field(default_factory=list)
+
+    def ordered(self) -> list[SpanRecord]:
+        """Spans in start order, parents before their children."""
+        return sorted(self.spans, key=lambda record: (record.offset, record.depth))
+
+
+_current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("current_trace", default=None)
+_depth: contextvars.ContextVar[int] = contextvars.ContextVar("span_depth", default=0)
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Collect the spans finished inside the block (in this thread or task)."""
+    run = Trace()
+    token = _current_trace.set(run)
+    try:
+        yield run
+    finally:
+        run.seconds = time.perf_counter() - run.started
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the block into ``gis_stage_seconds`` and the current trace, if any."""
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _depth.reset(token)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        run = _current_trace.get()
+        if run is not None:
+            run.spans.append(SpanRecord(stage=stage, depth=depth, offset=started - run.started, seconds=elapsed))
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator form of ``span``."""
+    def decorate(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
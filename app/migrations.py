@@ -0,0 +1,39 @@
+"""Idempotent schema migrations for the outbreaks table.
+
+Run with ``python -m app.migrations`` (uses ``DATABASE_URL``) as a deploy
+step, before starting the dashboard or the API. Adding ``row_id`` rewrites
+the table under an exclusive lock, so nothing applies migrations lazily:
+the dashboard only checks whether the column exists and, until it does,
+reloads the whole table on refresh and keeps the SQL backend off.
+"""
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Monotonically increasing id used as the incremental-refresh watermark
+WATERMARK_COLUMN = "row_id"
+
+# Indexes are built CONCURRENTLY so ingestion is not blocked. A build that
+# fails leaves an INVALID index behind: drop it before running again.
+MIGRATIONS: list[str] = [
+    f"ALTER TABLE outbreaks ADD COLUMN IF NOT EXISTS {WATERMARK_COLUMN} BIGSERIAL",
+    f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS outbreaks_{WATERMARK_COLUMN}_idx ON outbreaks ({WATERMARK_COLUMN})",
+    # Serves the SQL backend's filtered GROUP BYs (year, category, disease, country)
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS outbreaks_filter_idx ON outbreaks (year, icd10n, disease, iso3)",
+]
+
+
+def apply_migrations(conn: Connection) -> None:
+    """Apply every migration on a connection in autocommit mode
+    (``CREATE INDEX CONCURRENTLY`` cannot run inside a transaction)."""
+    for statement in MIGRATIONS:
+        conn.execute(text(statement))
+
+
+if __name__ == "__main__":
+    from app.db import get_engine
+
+    with get_engine().connect() as conn:
+        apply_migrations(conn.execution_options(isolation_level="AUTOCOMMIT"))
+    print(f"Applied {len(MIGRATIONS)} migrations")
@@ -0,0 +1,109 @@
+"""SQL for reading the outbreaks table: filtered rows, GROUP BY counts and
+the data version.
+
+Column names are only ever taken from the whitelists below; every value is
+a bound parameter. Builders return the statement and its parameters.
+Filters use the same shape as the dashboard's ``selection_criteria``:
+accepted values per column, None meaning "any".
+"""
+from __future__ import annotations
+
+from typing import Iterable, Mapping, Sequence
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.sql.elements import TextClause
+
+from app.ingest import INGEST_COLUMNS
+from app.migrations import WATERMARK_COLUMN
+
+TABLE = "outbreaks"
+ROW_COLUMNS = (WATERMARK_COLUMN, *INGEST_COLUMNS)
+FILTER_COLUMNS = ("year", "disease", "icd10n", "iso3", "country", "unsd_region", "unsd_subregion", "who_region")
+GROUP_COLUMNS = FILTER_COLUMNS
+COUNT_LABEL = "outbreaks"
+
+# Rows are never updated in place, so every commit changes the highest id or
+# the row count. Both are needed: ids are assigned at insert time, and a
+# transaction that commits late (a large stream chunk) adds rows below MAX.
+VERSION_QUERY = text(f"SELECT MAX({WATERMARK_COLUMN}), COUNT(*) FROM {TABLE}")
+
+
+def data_version(row: Sequence) -> str:
+    """``"<max row_id>.<row count>"`` from a ``VERSION_QUERY`` result row."""
+    latest, count = row
+    return f"{latest or 0}.{count}"
+
+
+def _check_columns(columns: Iterable[str], allowed: Sequence[str], kind: str) -> list[str]:
+    columns = list(columns)
+    unknown = [column for column in columns if column not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {kind} column(s) {unknown}; expected any of {list(allowed)}")
+    return columns
+
+
+def _where(
+    criteria: Mapping[str, Sequence | None],
+    year_range: tuple[int | None, int | None] = (None, None),
+) -> tuple[list[str], dict, list]:
+    """WHERE conditions, their parameters and the expanding (IN list) bind params."""
+    conditions: list[str] = []
+    params: dict = {}
+    expanding = []
+    for column in _check_columns(criteria, FILTER_COLUMNS, "filter"):
+        values = criteria[column]
+        if values is None:
+            continue
+        name = f"f_{column}"
+        conditions.append(f"{column} IN :{name}")
+        params[name] = list(values)
+        expanding.append(bindparam(name, expanding=True))
+    low, high = year_range
+    if low is not None:
+        conditions.append("year >= :year_from")
+        params["year_from"] = low
+    if high is not None:
+        conditions.append("year <= :year_to")
+        params["year_to"] = high
+    return conditions, params, expanding
+
+
+def rows_query(
+    criteria: Mapping[str, Sequence | None],
+    year_range: tuple[int | None, int | None] = (None, None),
+    after: int | None = None,
+    limit: int = 1000,
+    columns: Sequence[str] = ROW_COLUMNS,
+) -> tuple[TextClause, dict]:
+    """One keyset page of rows ordered by the watermark: rows with
+    ``row_id > after``, at most ``limit`` of them. The watermark column is
+    always selected so the caller can continue from the last row."""
+    columns = _check_columns(columns, ROW_COLUMNS, "row")
+    if WATERMARK_COLUMN not in columns:
+        columns.insert(0, WATERMARK_COLUMN)
+    conditions, params, expanding = _where(criteria, year_range)
+    if after is not None:
+        conditions.append(f"{WATERMARK_COLUMN} > :after")
+        params["after"] = after
+    params["limit"] = limit
+    # Quoted aliases keep mixed-case names (DONs) intact on Postgres
+    select = ", ".join(f'{column} AS "{column}"' for column in columns)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT {select} FROM {TABLE}{where} ORDER BY {WATERMARK_COLUMN} LIMIT :limit"
+    return text(sql).bindparams(*expanding), params
+
+
+def aggregate_query(
+    criteria: Mapping[str, Sequence | None],
+    by: Sequence[str],
+    year_range: tuple[int | None, int | None] = (None, None),
+) -> tuple[TextClause, dict]:
+    """Row counts per combination of the ``by`` columns, labelled ``outbreaks``."""
+    by = _check_columns(by, GROUP_COLUMNS, "group")
+    if not by:
+        raise ValueError("Group by at least one column")
+    conditions, params, expanding = _where(criteria, year_range)
+    group = ", ".join(by)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT {group}, COUNT(*) AS {COUNT_LABEL} FROM {TABLE}{where} GROUP BY {group} ORDER BY {group}"
+    return text(sql).bindparams(*expanding), params
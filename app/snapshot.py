@@ -0,0 +1,78 @@
+"""Local columnar snapshot of the normalized outbreaks frame.
+
+After every successful database load the frame is written to an Arrow IPC
+file. A new process memory-maps that file for an instant cold start and
+revalidates against the database in the background; the snapshot is also
+the first fallback when the database is unreachable. Snapshots are skipped
+when pyarrow is not installed.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+_METADATA_KEY = b"outbreaks_snapshot"
+
+
+@dataclass(frozen=True)
+class SnapshotInfo:
+    """Version stamp stored in the snapshot's schema metadata."""
+    watermark: int | None
+    rows: int
+    written_at: float
+    format: int = SNAPSHOT_FORMAT
+
+
+def write_snapshot(path: str, df: pd.DataFrame, watermark: int | None) -> None:
+    """Atomically write ``df`` and its version stamp to ``path``."""
+    if pa is None:
+        return
+    info = SnapshotInfo(watermark=watermark, rows=len(df), written_at=time.time())
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _METADATA_KEY: json.dumps(info.__dict__).encode(),
+    })
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write data snapshot %s: %s", path, e)
+
+
+def read_snapshot(path: str, columns: list[str]) -> tuple[pd.DataFrame, SnapshotInfo] | None:
+    """Memory-map the snapshot at ``path``.
+
+    Returns None when there is no usable snapshot: pyarrow is missing, the
+    file does not exist or is unreadable, it was written by an incompatible
+    version, or its columns are not a subset of ``columns``.
+    """
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            raw_info = (table.schema.metadata or {}).get(_METADATA_KEY)
+            info = SnapshotInfo(**json.loads(raw_info)) if raw_info else None
+            if info is None or info.format != SNAPSHOT_FORMAT or not set(table.column_names) <= set(columns):
+                return None
+            return table.to_pandas(), info
+    except (OSError, pa.ArrowInvalid, TypeError, ValueError) as e:
+        logger.warning("Ignoring unreadable data snapshot %s: %s", path, e)
+        return None
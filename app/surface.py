@@ -0,0 +1,198 @@
+"""Gridded intensity surfaces for the isoline chart.
+
+Two engines are available. ``interpolate`` triangulates the points and
+evaluates a cubic (or linear) interpolant on a fixed grid; triangulations
+and interpolators are built once per point set and kept in bounded LRU
+caches. ``kde`` bins the points with ``np.histogram2d`` onto a grid sized
+for the region and smooths it with an FFT Gaussian convolution, so its cost
+depends on the grid rather than the number of points. Evaluated grids from
+either engine are cached, so reruns that only change the theme, or return
+to an earlier filter, skip the computation entirely.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator
+from scipy.signal import fftconvolve
+from scipy.spatial import Delaunay, QhullError
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+INTERPOLATION_METHODS = ("cubic", "linear")
+DEFAULT_RESOLUTION = 50
+SURFACE_ENGINES = ("interpolate", "kde")
+# "auto" switches to the KDE engine above this many points, unless the
+# region sets its own threshold
+KDE_MIN_POINTS = 2000
+# Kernel truncated at this many standard deviations
+KDE_TRUNCATE = 3.0
+
+_triangulations = LRUCache(maxsize=8)
+_interpolators = LRUCache(maxsize=16)
+_surfaces = LRUCache(maxsize=32)
+
+
+@dataclass(frozen=True)
+class Surface:
+    """Intensity ``z[i, j]`` at latitude ``lat[i]`` and longitude ``lon[j]``."""
+    lat: np.ndarray
+    lon: np.ndarray
+    z: np.ndarray
+
+
+@dataclass(frozen=True)
+class RegionGrid:
+    """Map extent of a region, the KDE cell size and bandwidth used there,
+    and the point count above which ``"auto"`` picks the KDE engine."""
+    lat_range: tuple[float, float]
+    lon_range: tuple[float, float]
+    cell_degrees: float
+    bandwidth_degrees: float
+    kde_min_points: int = KDE_MIN_POINTS
+
+
+# At most MAX_POINTS_PER_COUNTRY points per gazetteer entry reach the surface
+# (about 1,200 worldwide), so point counts alone never favour KDE. Over
+# Africa and the globe the 50 x 50 interpolation grid has 1.4-7 degree
+# cells, coarser than the KDE grid, so "auto" always uses KDE there.
+REGION_GRIDS = {
+    "Nigeria": RegionGrid((6, 14), (3, 15), cell_degrees=0.1, bandwidth_degrees=0.75),
+    "Africa": RegionGrid((-35, 37), (-18, 52), cell_degrees=0.5, bandwidth_degrees=2.0, kde_min_points=0),
+    "Global": RegionGrid((-60, 80), (-180, 180), cell_degrees=1.0, bandwidth_degrees=3.0, kde_min_points=0),
+}
+
+
+def clear_caches() -> None:
+    """Drop cached triangulations, interpolators and grids."""
+    for cache in (_triangulations, _interpolators, _surfaces):
+        cache.clear()
+
+
+def region_grid(region: str) -> RegionGrid:
+    return REGION_GRIDS.get(region, REGION_GRIDS["Global"])
+
+
+def choose_engine(engine: str, num_points: int, region: str = "Global") -> str:
+    """Resolve ``"auto"`` to a concrete engine for ``num_points`` points in ``region``."""
+    if engine == "auto":
+        return "kde" if num_points > region_grid(region).kde_min_points else "interpolate"
+    if engine not in SURFACE_ENGINES:
+        raise ValueError(f"Unknown surface engine {engine!r}")
+    return engine
+
+
+def points_key(points: np.ndarray, values: np.ndarray) -> str:
+    """Content hash of a point set and its values."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (points, values):
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _interpolator(key: str, points: np.ndarray, values: np.ndarray, method: str):
+    def build():
+        tri = _triangulations.get_or_build(key, lambda: Delaunay(points))
+        if method == "cubic":
+            return CloughTocher2DInterpolator(tri, values, fill_value=0)
+        return LinearNDInterpolator(tri, values, fill_value=0)
+
+    return _interpolators.get_or_build((key, method), build)
+
+
+def _evaluate(key: str, points: np.ndarray, values: np.ndarray, method: str, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    lat_mesh, lon_mesh = np.meshgrid(lat, lon, indexing="ij")
+    try:
+        return _interpolator(key, points, values, method)(lat_mesh, lon_mesh)
+    except QhullError as e:
+        # Too few or degenerate points to triangulate: nothing to draw
+        logger.info("Cannot triangulate %d points: %s", len(points), e)
+        return np.zeros(lat_mesh.shape)
+    except ValueError:
+        if method == "linear":
+            raise
+        # The cubic fit can fail where linear still works; the triangulation is reused
+        return _interpolator(key, points, values, "linear")(lat_mesh, lon_mesh)
+
+
+def interpolated_surface(
+    points: np.ndarray,
+    values: np.ndarray,
+    lat_range: tuple[float, float],
+    lon_range: tuple[float, float],
+    region: str = "Global",
+    method: str = "cubic",
+    resolution: int = DEFAULT_RESOLUTION,
+) -> Surface:
+    """Interpolate ``values`` at ``points`` (``(n, 2)`` lat/lon pairs) onto a
+    ``resolution`` x ``resolution`` grid spanning the given ranges.
+
+    Results are cached per point set, region, method and grid; treat the
+    returned arrays as read-only.
+    """
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation method {method!r}")
+    points = np.asarray(points, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    key = points_key(points, values)
+
+    def build() -> Surface:
+        lat = np.linspace(lat_range[0], lat_range[1], resolution)
+        lon = np.linspace(lon_range[0], lon_range[1], resolution)
+        z = _evaluate(key, points, values, method, lat, lon)
+        for array in (lat, lon, z):
+            array.flags.writeable = False
+        return Surface(lat=lat, lon=lon, z=z)
+
+    return _surfaces.get_or_build((key, region, method, lat_range, lon_range, resolution), build)
+
+
+def _gaussian_kernel(sigma_cells: float) -> np.ndarray:
+    radius = max(1, int(np.ceil(KDE_TRUNCATE * sigma_cells)))
+    offsets = np.arange(-radius, radius + 1)
+    kernel_1d = np.exp(-0.5 * (offsets / sigma_cells) ** 2)
+    kernel = np.outer(kernel_1d, kernel_1d)
+    return kernel / kernel.sum()
+
+
+def kde_surface(
+    points: np.ndarray,
+    weights: np.ndarray,
+    region: str = "Global",
+    bandwidth_degrees: float | None = None,
+) -> Surface:
+    """Weighted Gaussian kernel density of ``points`` (``(n, 2)`` lat/lon
+    pairs) on the region's grid.
+
+    Points are binned with ``np.histogram2d`` and the bin totals convolved
+    with the kernel via FFT, so the cost is O(n + cells log cells). Values
+    are kernel-weighted sums of ``weights`` per cell. Cached like
+    ``interpolated_surface``; treat the returned arrays as read-only.
+    """
+    grid = region_grid(region)
+    bandwidth = bandwidth_degrees or grid.bandwidth_degrees
+    points = np.asarray(points, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    key = points_key(points, weights)
+
+    def build() -> Surface:
+        lat_edges = np.arange(grid.lat_range[0], grid.lat_range[1] + grid.cell_degrees / 2, grid.cell_degrees)
+        lon_edges = np.arange(grid.lon_range[0], grid.lon_range[1] + grid.cell_degrees / 2, grid.cell_degrees)
+        binned, _, _ = np.histogram2d(points[:, 0], points[:, 1], bins=(lat_edges, lon_edges), weights=weights)
+        # Zero padding in fftconvolve keeps mass from wrapping around the map edges
+        z = fftconvolve(binned, _gaussian_kernel(bandwidth / grid.cell_degrees), mode="same")
+        np.maximum(z, 0, out=z)  # round-off can leave tiny negatives
+        lat = (lat_edges[:-1] + lat_edges[1:]) / 2
+        lon = (lon_edges[:-1] + lon_edges[1:]) / 2
+        for array in (lat, lon, z):
+            array.flags.writeable = False
+        return Surface(lat=lat, lon=lon, z=z)
+
+    return _surfaces.get_or_build((key, region, "kde", bandwidth), build)
@@ -3,8 +3,10 @@ from __future__ import annotations
 # UI component imports
 from app.ui_components.header import inject_header_css
 from app.ui_components.sidebar import sidebar
+from app.ui_components.performance import performance_panel
 
 __all__ = [
         "inject_header_css",
         "sidebar",
+        "performance_panel",
 ]
@@ -1,8 +1,10 @@
 from __future__ import annotations
 import streamlit as st
 
+from app.cube import total
+
 def render_metrics(df):
-    total_outbreaks = len(df)
+    total_outbreaks = total(df)
     unique_countries = df['country'].nunique()
     unique_diseases = df['disease'].nunique()
     year_span = df['year'].max() - df['year'].min()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from app.metrics import STAGE_SECONDS, Trace
+
+
+def performance_panel(trace: Trace | None) -> None:
+    """Opt-in sidebar breakdown of a run's time by stage.
+
+    Nested stages are indented under the stage that called them; "share" is
+    relative to the whole run.
+    """
+    with st.sidebar:
+        if not st.toggle("Performance", key="show_performance",
+                         help="Show how long each stage of the last rerun took"):
+            return
+        if trace is None or trace.seconds is None:
+            st.caption("Timings appear after the next rerun.")
+            return
+        spans = trace.ordered()
+        accounted = sum(record.seconds for record in spans if record.depth == 0)
+        rows = [(f"{'· ' * record.depth}{record.stage}", record.seconds) for record in spans]
+        rows.append(("(other)", max(trace.seconds - accounted, 0.0)))
+        st.caption(f"Last rerun: {trace.seconds * 1000:,.0f} ms")
+        st.dataframe(
+            pd.DataFrame({
+                "stage": [stage for stage, _ in rows],
+                "ms": [seconds * 1000 for _, seconds in rows],
+                "share": [seconds / trace.seconds if trace.seconds else 0.0 for _, seconds in rows],
+            }),
+            column_config={
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "share": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="percent"),
+            },
+            hide_index=True,
+        )
+        with st.expander("Since server start"):
+            totals = STAGE_SECONDS.summary()
+            st.dataframe(
+                pd.DataFrame(
+                    [(stage, count, total * 1000 / count) for (stage,), (count, total) in sorted(totals.items())],
+                    columns=["stage", "runs", "mean ms"],
+                ),
+                column_config={"mean ms": st.column_config.NumberColumn(format="%.1f")},
+                hide_index=True,
+            )
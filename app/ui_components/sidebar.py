@@ -5,11 +5,11 @@ import streamlit as st
 from PIL import Image
 
 from app.config import COLOR_THEME_OPTIONS, ALT_BASE_COLORS, Paths
-from app.data import years_sorted, filter_df
+from app.backends import OutbreakBackend
 
 
-def sidebar(df) -> Tuple[str, List[int], str, str, str, str, List[str]]:
-    """Render the sidebar and return selections.
+def sidebar(backend: OutbreakBackend) -> Tuple[str, List[int], str, str, str, str, List[str]]:
+    """Render the sidebar, with options from ``backend``, and return selections.
 
     Returns: (page, years_selected, color_theme, alt_base_color, region_filter, selected_category, selected_diseases)
     """
@@ -29,8 +29,14 @@ def sidebar(df) -> Tuple[str, List[int], str, str, str, str, List[str]]:
             refresh_clicked = st.button("🔄 Retry Connection", help="Retry loading data from database", type="primary")
         else:
             refresh_clicked = st.button("🔄 Refresh Data", help="Click to reload data from database")
-        if refresh_clicked:
+        hard_clicked = data_source == 'database' and st.button(
+            "Full reload", help="Discard cached data and reload the whole table"
+        )
+        if refresh_clicked or hard_clicked:
+            # Invalidate the shared cache for every session, then reload now
+            backend.invalidate(hard=hard_clicked)
             st.session_state.refresh_data = True
+            st.rerun()
 
         # Page selection
         page = st.radio("Select Page", ["All insights", "Choropleth", "Heatmaps & Isolines"], horizontal=False)
@@ -44,7 +50,7 @@ def sidebar(df) -> Tuple[str, List[int], str, str, str, str, List[str]]:
         )
 
         # Year selection
-        ys = years_sorted(df)
+        ys = backend.years()
         year_choice = st.selectbox("Year", ["All years"] + [str(y) for y in ys])
         if year_choice != "All years":
             extra_years = st.multiselect("Add more years",
@@ -61,11 +67,10 @@ def sidebar(df) -> Tuple[str, List[int], str, str, str, str, List[str]]:
         
         # Data filters
         st.caption("Data Filters")
-        categories = ["All"] + sorted([c for c in df["icd10n"].dropna().unique().tolist() if c])
+        categories = ["All"] + backend.categories()
         selected_category = st.selectbox("Category", categories)
 
-        df_pool = filter_df(df, years_selected, selected_category)
-        disease_options = df_pool["disease"].value_counts().sort_values(ascending=False).index.tolist()
+        disease_options = backend.disease_options(years_selected, selected_category)
         selected_diseases = st.multiselect("Diseases", disease_options, default=[])
 
     return page, years_selected, color_theme, alt_base_color, region_filter, selected_category, selected_diseases
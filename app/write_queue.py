@@ -0,0 +1,167 @@
+"""In-process write coalescing for single-record ingestion.
+
+Validated records are put on a bounded asyncio queue and acknowledged
+immediately; one background task writes them as a single multi-row INSERT
+whenever ``flush_rows`` records are waiting or ``flush_ms`` milliseconds
+after the first of them arrived, whichever comes first. A full queue
+rejects new records so the API can push back on clients. ``stop`` flushes
+everything still queued, so a graceful shutdown loses nothing unless it
+takes longer than its timeout. A flush that fails on a connection error is
+retried with exponential backoff; one rejected by the database (a bad
+record) is retried row by row, so only the offending records are dropped.
+Records are lost only if the process dies, the database stays unreachable
+through every retry, or the database rejects them (logged and counted).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app import metrics
+from app.ingest import write_rows
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = metrics.gauge("gis_write_queue_depth", "Records waiting in the write queue.")
+QUEUE_ROWS = metrics.counter(
+    "gis_write_queue_rows_total", "Records by outcome: flushed, failed or rejected (queue full).", ("outcome",)
+)
+FLUSH_SECONDS = metrics.histogram("gis_write_queue_flush_seconds", "Time taken by one coalesced INSERT.")
+FLUSH_ROWS = metrics.histogram(
+    "gis_write_queue_flush_rows", "Records written per flush.", buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+
+FLUSH_RETRIES = 5
+FLUSH_BACKOFF_SECONDS = 0.1  # doubled after each failed attempt
+
+
+class WriteQueue:
+    """Bounded queue of records flushed to ``engine`` by one background task."""
+
+    def __init__(self, engine: AsyncEngine, max_rows: int = 10000, flush_rows: int = 500, flush_ms: float = 50) -> None:
+        if not 1 <= flush_rows <= max_rows:
+            raise ValueError("flush_rows must be between 1 and max_rows")
+        self.engine = engine
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_ms / 1000
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max_rows)
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self._flushing = 0  # records in the INSERT under way
+        # Connection-level failures worth retrying; COPY raises the driver's own errors
+        self._transient = (OperationalError, InterfaceError, OSError, engine.dialect.dbapi.OperationalError)
+        # Set when the first record of a batch arrives, a batch fills up or stop() is called
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, record: dict[str, Any]) -> bool:
+        """Queue ``record``; False when the queue is full or shutting down."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            QUEUE_ROWS.inc(outcome="rejected")
+            return False
+        depth = self._queue.qsize()
+        QUEUE_DEPTH.set(depth)
+        if depth == 1 or depth >= self.flush_rows:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="write-queue")
+
+    async def stop(self, timeout: float | None = 30) -> None:
+        """Stop accepting records and flush everything still queued.
+
+        Records still queued after ``timeout`` seconds are dropped (and
+        counted as failed) so shutdown cannot hang on an unreachable database.
+        """
+        self._closed = True
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="write-queue")
+        try:
+            # Shielded: on timeout the task is cancelled below, between flushes
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except TimeoutError:
+            self._task.cancel()
+            dropped = self._queue.qsize() + self._flushing
+            QUEUE_ROWS.inc(dropped, outcome="failed")
+            logger.error("Write queue did not drain within %ss; %d queued records dropped", timeout, dropped)
+
+    def _take(self, limit: int) -> list[dict[str, Any]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            if self._queue.empty():
+                if self._closed:
+                    return
+                await self._wakeup.wait()
+                continue
+            # Wait for a full batch, stop() or the deadline, whichever is first
+            deadline = loop.time() + self.flush_seconds
+            while self._queue.qsize() < self.flush_rows and not self._closed:
+                self._wakeup.clear()
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    break
+            await self._flush(self._take(self.flush_rows))
+
+    async def _flush(self, batch: list[dict[str, Any]]) -> None:
+        QUEUE_DEPTH.set(self._queue.qsize())
+        if not batch:
+            return
+        self._flushing = len(batch)
+        try:
+            await self._write(batch)
+        except self._transient as e:
+            QUEUE_ROWS.inc(len(batch), outcome="failed")
+            logger.error("Write queue flush of %d records failed after %d retries: %s", len(batch), FLUSH_RETRIES, e)
+        except Exception as e:
+            logger.warning("Write queue flush of %d records failed, writing them one by one: %s", len(batch), e)
+            for record in batch:
+                try:
+                    await self._write([record])
+                except Exception as e:
+                    QUEUE_ROWS.inc(outcome="failed")
+                    logger.error("Write queue dropped a record: %s", e)
+                else:
+                    QUEUE_ROWS.inc(outcome="flushed")
+                self._flushing -= 1
+        else:
+            FLUSH_ROWS.observe(len(batch))
+            QUEUE_ROWS.inc(len(batch), outcome="flushed")
+        finally:
+            self._flushing = 0
+
+    async def _write(self, batch: list[dict[str, Any]]) -> None:
+        """Write ``batch`` in one transaction, retrying connection failures."""
+        delay = FLUSH_BACKOFF_SECONDS
+        for attempt in range(FLUSH_RETRIES + 1):
+            try:
+                with FLUSH_SECONDS.time():
+                    async with self.engine.begin() as conn:
+                        await write_rows(conn, batch)
+                return
+            except self._transient as e:
+                if attempt == FLUSH_RETRIES:
+                    raise
+                logger.warning("Write queue flush failed (attempt %d), retrying in %.1fs: %s", attempt + 1, delay, e)
+                await asyncio.sleep(delay)
+                delay *= 2
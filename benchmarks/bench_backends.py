@@ -0,0 +1,73 @@
+"""Query backends: the same sidebar selection answered in pandas and in SQL.
+
+Warm pandas timings start from the loaded, versioned frame; the cold one
+includes reading the table and building the cube, which is the work the SQL
+backend avoids. SQL timings are uncached (a new data version) and run
+against SQLite standing in for Postgres, so compare them with care.
+"""
+from __future__ import annotations
+
+import pytest
+
+from app.backends import PandasBackend, SqlBackend
+from app.data import OUTBREAK_COLUMNS, _read_outbreaks, filter_index, selection_criteria
+
+pytestmark = pytest.mark.benchmark(group="backends")
+
+
+@pytest.fixture(scope="session")
+def pandas_backend(outbreaks):
+    backend = PandasBackend(outbreaks)
+    filter_index(backend.cube)  # built once per dataset version in the app
+    return backend
+
+
+@pytest.fixture(scope="session")
+def sql_backend(sqlite_engine):
+    backend = SqlBackend(sqlite_engine)
+    backend.columns()
+    return backend
+
+
+def _uncached(backend, **kwargs):
+    def setup():
+        backend.invalidate(hard=True)
+        return (), kwargs
+    return setup
+
+
+def bench_pandas_view(benchmark, pandas_backend, selection):
+    benchmark(pandas_backend.view, **selection)
+
+
+def bench_pandas_view_cold(benchmark, sqlite_engine, selection):
+    def load_and_view():
+        df, _ = _read_outbreaks(sqlite_engine, list(OUTBREAK_COLUMNS))
+        return PandasBackend(df).view(**selection)
+    benchmark.pedantic(load_and_view, rounds=3)
+
+
+def bench_sql_view(benchmark, sql_backend, selection):
+    benchmark.pedantic(sql_backend.view, setup=_uncached(sql_backend, **selection), rounds=5)
+
+
+def bench_pandas_aggregate_by_year(benchmark, pandas_backend, selection):
+    criteria = selection_criteria(filter_index(pandas_backend.cube), selection["years"], selection["category"],
+                                  region=selection["region"])
+    benchmark(pandas_backend.aggregate, criteria, ["year"])
+
+
+def bench_sql_aggregate_by_year(benchmark, sql_backend, selection):
+    criteria = selection_criteria(sql_backend.columns(), selection["years"], selection["category"],
+                                  region=selection["region"])
+    benchmark.pedantic(sql_backend.aggregate, setup=_uncached(sql_backend, criteria=criteria, by=["year"]), rounds=5)
+
+
+def bench_pandas_disease_options(benchmark, pandas_backend, selection):
+    benchmark(pandas_backend.disease_options, selection["years"], selection["category"])
+
+
+def bench_sql_disease_options(benchmark, sql_backend, selection):
+    benchmark.pedantic(sql_backend.disease_options,
+                       setup=_uncached(sql_backend, years=selection["years"], category=selection["category"]),
+                       rounds=5)
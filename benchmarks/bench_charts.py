@@ -0,0 +1,71 @@
+"""Chart stages, each timed uncached on the filtered count cube."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import surface
+from app.charts.choropleth import build_animated_choropleth, build_choropleth, geo_outbreaks, year_frames
+from app.charts.heatmap import _sample_coordinates, bin_points, generate_sample_coordinates, geo_counts, heatmap_cell_degrees
+from app.charts.insights import summarize
+from app.data import filter_df
+from app.surface import REGION_GRIDS, interpolated_surface, kde_surface
+
+pytestmark = pytest.mark.benchmark(group="charts")
+
+
+@pytest.fixture(scope="session")
+def view(cube):
+    """The cube filtered to all years, worldwide (the dashboard's default view)."""
+    return filter_df(cube, sorted(cube["year"].unique().tolist()), "All", [], "Global")
+
+
+@pytest.fixture(scope="session")
+def coords(view):
+    return generate_sample_coordinates(geo_counts(view))
+
+
+def bench_geo_counts(benchmark, view, unversioned):
+    benchmark(geo_counts, unversioned(view))
+
+
+def bench_sample_coordinates(benchmark, view):
+    geo = geo_counts(view)
+    benchmark.pedantic(generate_sample_coordinates, args=(geo,), setup=_sample_coordinates.cache_clear, rounds=20)
+
+
+@pytest.mark.parametrize("method", ["cubic", "linear"])
+def bench_interpolated_surface(benchmark, coords, method):
+    grid = REGION_GRIDS["Global"]
+    points = np.column_stack((coords["lat"], coords["lon"]))
+    benchmark.pedantic(
+        interpolated_surface, args=(points, coords["intensity"], grid.lat_range, grid.lon_range),
+        kwargs={"method": method}, setup=surface.clear_caches, rounds=10,
+    )
+
+
+def bench_kde_surface(benchmark, coords):
+    points = np.column_stack((coords["lat"], coords["lon"]))
+    benchmark.pedantic(kde_surface, args=(points, coords["intensity"]), setup=surface.clear_caches, rounds=10)
+
+
+def bench_heatmap_binning(benchmark, coords):
+    benchmark(bin_points, coords["lat"], coords["lon"], coords["intensity"], heatmap_cell_degrees(1.5))
+
+
+def bench_insights_summaries(benchmark, view, unversioned):
+    benchmark(summarize, unversioned(view))
+
+
+def bench_year_frames(benchmark, view, unversioned):
+    benchmark(year_frames, unversioned(view))
+
+
+def bench_choropleth_figure(benchmark, view):
+    geo = geo_outbreaks(view)
+    benchmark.pedantic(build_choropleth, args=(geo, "Reds"), rounds=5)
+
+
+def bench_animated_choropleth_figure(benchmark, view):
+    frames = year_frames(view)
+    benchmark.pedantic(build_animated_choropleth, args=(frames,), rounds=5)
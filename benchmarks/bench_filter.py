@@ -0,0 +1,37 @@
+"""Filtering stages: count cube, filter index and sidebar selections."""
+from __future__ import annotations
+
+import pytest
+
+from app.cube import build_cube
+from app.data import disease_options, filter_df, filter_index
+from app.filter_index import FilterIndex
+
+pytestmark = pytest.mark.benchmark(group="filter")
+
+
+def bench_build_cube(benchmark, outbreaks):
+    benchmark(build_cube, outbreaks)
+
+
+def bench_build_filter_index(benchmark, outbreaks):
+    benchmark(FilterIndex, outbreaks)
+
+
+def bench_build_cube_filter_index(benchmark, cube):
+    benchmark(FilterIndex, cube)
+
+
+def bench_filter_rows(benchmark, outbreaks, selection):
+    filter_index(outbreaks)  # built once per dataset version in the app
+    benchmark(filter_df, outbreaks, **selection)
+
+
+def bench_filter_cube(benchmark, cube, selection):
+    filter_index(cube)
+    benchmark(filter_df, cube, **selection)
+
+
+def bench_disease_options(benchmark, cube, selection):
+    filter_index(cube)
+    benchmark(disease_options, cube, selection["years"], selection["category"])
@@ -0,0 +1,44 @@
+"""Data loading stages: database read, normalization, snapshot and CSV fallback."""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app.data import LOAD_CHUNK_ROWS, OUTBREAK_COLUMNS, _read_outbreaks, concat_frames, normalize
+from app.snapshot import pa, read_snapshot, write_snapshot
+
+pytestmark = pytest.mark.benchmark(group="load")
+
+
+def bench_read_database(benchmark, sqlite_engine):
+    columns = list(OUTBREAK_COLUMNS)
+    df, watermark = benchmark.pedantic(_read_outbreaks, args=(sqlite_engine, columns), rounds=3)
+    assert watermark == len(df)
+
+
+def bench_normalize(benchmark, raw):
+    benchmark(normalize, raw)
+
+
+def bench_concat_chunks(benchmark, raw):
+    chunks = [normalize(raw.iloc[start:start + LOAD_CHUNK_ROWS]) for start in range(0, len(raw), LOAD_CHUNK_ROWS)]
+    benchmark(concat_frames, chunks)
+
+
+@pytest.mark.skipif(pa is None, reason="pyarrow is not installed")
+def bench_snapshot_write(benchmark, outbreaks, tmp_path):
+    benchmark(write_snapshot, str(tmp_path / "outbreaks.arrow"), outbreaks, len(outbreaks))
+
+
+@pytest.mark.skipif(pa is None, reason="pyarrow is not installed")
+def bench_snapshot_read(benchmark, outbreaks, tmp_path):
+    path = str(tmp_path / "outbreaks.arrow")
+    write_snapshot(path, outbreaks, len(outbreaks))
+    df, _ = benchmark(read_snapshot, path, list(outbreaks.columns))
+    assert len(df) == len(outbreaks)
+
+
+def bench_read_csv(benchmark, raw, tmp_path):
+    path = tmp_path / "outbreaks.csv"
+    raw.to_csv(path, index=False)
+    benchmark.pedantic(lambda: normalize(pd.read_csv(path)), rounds=3)
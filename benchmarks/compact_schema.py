@@ -0,0 +1,64 @@
+"""Compare the raw and compact (categorical) outbreaks schema.
+
+Run from the repository root::
+
+    python -m benchmarks.compact_schema --rows 1000000
+
+Reports memory use and the time of the dashboard's typical groupby and
+filter operations on both representations.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+from app.data import filter_df, normalize
+from benchmarks.synthetic import synthetic_outbreaks
+
+
+def _best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _operations(df: pd.DataFrame) -> dict:
+    years = sorted(df["year"].unique().tolist())[-5:]
+    diseases = df["disease"].value_counts().index[:3].tolist()
+    return {
+        "groupby iso3/country": lambda: df.groupby(["iso3", "country"], observed=True).size(),
+        "groupby disease": lambda: df.groupby("disease", observed=True).size(),
+        "groupby year": lambda: df.groupby("year").size(),
+        "filter_df": lambda: filter_df(df, years, "Category 00", diseases),
+        "region mask": lambda: df[df["unsd_region"] == "Africa"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = synthetic_outbreaks(args.rows)
+    compact = normalize(raw)
+    raw_mb = raw[compact.columns].memory_usage(deep=True).sum() / 2**20
+    compact_mb = compact.memory_usage(deep=True).sum() / 2**20
+    print(f"{args.rows:,} rows")
+    print(f"{'':<24}{'raw':>10}{'compact':>10}{'gain':>9}")
+    print(f"{'memory (MiB)':<24}{raw_mb:>10.1f}{compact_mb:>10.1f}{raw_mb / compact_mb:>9.1f}x")
+
+    raw_ops, compact_ops = _operations(raw[compact.columns]), _operations(compact)
+    for name in raw_ops:
+        before = _best_of(raw_ops[name], args.repeat) * 1000
+        after = _best_of(compact_ops[name], args.repeat) * 1000
+        print(f"{name + ' (ms)':<24}{before:>10.1f}{after:>10.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
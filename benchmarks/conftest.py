@@ -0,0 +1,97 @@
+"""Fixtures for the offline benchmark suite.
+
+Run from the repository root::
+
+    python -m pytest benchmarks                  # 10k, 100k and 1M rows
+    python -m pytest benchmarks --large          # ... and 10M rows
+    python -m pytest benchmarks --rows 100000 -k filter
+
+Every stage is a separate benchmark, grouped by stage and table size.
+Results are saved as JSON under ``.benchmarks/`` (``--benchmark-autosave``);
+compare runs across commits with ``pytest-benchmark compare``.
+"""
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from app.cube import build_cube
+from app.data import LOAD_CHUNK_ROWS, normalize
+from benchmarks.synthetic import synthetic_outbreaks
+
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+LARGE_ROWS = 10_000_000
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("outbreak benchmarks")
+    group.addoption("--rows", default=os.getenv("BENCH_ROWS"),
+                    help="comma-separated table sizes (default: 10000,100000,1000000; env BENCH_ROWS)")
+    group.addoption("--large", action="store_true", help=f"also run {LARGE_ROWS:,} rows")
+
+
+def _sizes(config: pytest.Config) -> list[int]:
+    option = config.getoption("--rows")
+    sizes = [int(size) for size in option.split(",")] if option else list(DEFAULT_ROWS)
+    if config.getoption("--large") and LARGE_ROWS not in sizes:
+        sizes.append(LARGE_ROWS)
+    return sizes
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if "rows" in metafunc.fixturenames:
+        sizes = _sizes(metafunc.config)
+        metafunc.parametrize("rows", sizes, ids=[f"{size:_}" for size in sizes], scope="session")
+
+
+@pytest.fixture(scope="session")
+def raw(rows: int) -> pd.DataFrame:
+    """Synthetic outbreaks with plain string labels, as read from the database."""
+    return synthetic_outbreaks(rows)
+
+
+@pytest.fixture(scope="session")
+def outbreaks(raw: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """The normalized frame, versioned like frames served by the data cache."""
+    df = normalize(raw)
+    df.attrs["dataset_version"] = f"bench@{rows}"
+    return df
+
+
+@pytest.fixture(scope="session")
+def sqlite_engine(raw, rows, tmp_path_factory):
+    """The synthetic table in a SQLite file, standing in for Postgres."""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / f'outbreaks_{rows}.db'}")
+    raw.to_sql("outbreaks", engine, index=False, chunksize=LOAD_CHUNK_ROWS)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def cube(outbreaks: pd.DataFrame) -> pd.DataFrame:
+    cube = build_cube(outbreaks)
+    cube.attrs["dataset_version"] = outbreaks.attrs["dataset_version"]
+    return cube
+
+
+@pytest.fixture(scope="session")
+def selection(outbreaks: pd.DataFrame) -> dict:
+    """A typical sidebar selection: five recent years, the busiest category and
+    its three most frequent diseases, in Africa."""
+    years = sorted(outbreaks["year"].unique().tolist())[-5:]
+    category = outbreaks["icd10n"].value_counts().index[0]
+    diseases = outbreaks.loc[outbreaks["icd10n"] == category, "disease"].value_counts().index[:3].tolist()
+    return {"years": years, "category": category, "diseases": diseases, "region": "Africa"}
+
+
+@pytest.fixture
+def unversioned():
+    """Strip the dataset version so memoized builders recompute on every call."""
+    def strip(frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.copy(deep=False)
+        frame.attrs = {}
+        return frame
+    return strip
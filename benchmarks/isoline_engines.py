@@ -0,0 +1,59 @@
+"""Compare the interpolation and KDE surface engines of the isoline chart.
+
+Run from the repository root::
+
+    python -m benchmarks.isoline_engines --points 1000 10000 100000
+
+Reports the uncached time to build each region's surface from a seeded
+random point set, and the time of a cached rerun.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app import surface
+from app.surface import REGION_GRIDS, interpolated_surface, kde_surface
+
+
+def _best_of(fn, repeat: int, cached: bool = False) -> float:
+    timings = []
+    for _ in range(repeat):
+        if not cached:
+            surface.clear_caches()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _points(count: int, region: str, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    grid = REGION_GRIDS[region]
+    rng = np.random.default_rng(seed)
+    points = np.column_stack((rng.uniform(*grid.lat_range, size=count), rng.uniform(*grid.lon_range, size=count)))
+    return points, rng.gamma(2.0, 5.0, size=count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'region':<10}{'points':>10}{'interpolate (ms)':>18}{'kde (ms)':>10}{'cached (ms)':>13}")
+    for region, grid in REGION_GRIDS.items():
+        for count in args.points:
+            points, values = _points(count, region, args.seed)
+            interpolate = lambda: interpolated_surface(points, values, grid.lat_range, grid.lon_range, region=region)
+            kde = lambda: kde_surface(points, values, region=region)
+            interpolate_ms = _best_of(interpolate, args.repeat) * 1000
+            kde_ms = _best_of(kde, args.repeat) * 1000
+            cached_ms = _best_of(kde, args.repeat, cached=True) * 1000
+            print(f"{region:<10}{count:>10,}{interpolate_ms:>18.1f}{kde_ms:>10.1f}{cached_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Load test for the ingestion API against a local database stand-in.
+
+Run from the repository root::
+
+    python -m benchmarks.load_api --mode single --requests 2000 --concurrency 32
+    python -m benchmarks.load_api --mode batch --requests 200 --batch-size 500
+    python -m benchmarks.load_api --mode stream --requests 20 --batch-size 10000
+    python -m benchmarks.load_api --mode queued --requests 2000 --concurrency 32
+
+The FastAPI app runs in-process (httpx ASGI transport, lifespan included)
+against a throwaway SQLite file, or against ``--database-url`` (e.g. a local
+scratch Postgres with the ``outbreaks`` table). Rate limits are disabled.
+Synthetic ``OutbreakRecord`` payloads are replayed by ``--concurrency``
+workers, and throughput, latency percentiles and error rates are printed
+as JSON. ``queued`` sends single records with the write queue enabled
+(``WRITE_QUEUE=1``); the table is counted after the queue has drained.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import SQLITE_SCHEMA, synthetic_outbreaks
+
+MODES = ("single", "queued", "batch", "stream")
+API_KEY = "load-test"
+
+def synthetic_records(count: int, seed: int = 42) -> list[dict]:
+    """``count`` payloads matching ``OutbreakRecord``."""
+    df = synthetic_outbreaks(count, seed=seed).drop(columns="row_id")
+    df["year"] = df["year"].astype(int)
+    df["DONs"] = [f"DON{i:06d}" for i in range(count)]
+    return df.to_dict("records")
+
+
+def _sqlite_database(directory: str) -> str:
+    from sqlalchemy import create_engine, text
+
+    path = Path(directory) / "outbreaks.db"
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("PRAGMA journal_mode=WAL"))
+        conn.execute(text(SQLITE_SCHEMA))
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+def _configure(database_url: str, mode: str = "batch") -> None:
+    """Point the API module at the stand-in; must run before it is imported."""
+    os.environ["API_KEY"] = API_KEY
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["BATCH_ROW_RATE_LIMIT"] = "1000000000/second"
+    os.environ["WRITE_QUEUE"] = "1" if mode == "queued" else "0"
+
+
+def _requests(mode: str, records: list[dict], batch_size: int) -> list[tuple[str, dict, int]]:
+    """(path, httpx request kwargs, record count) for every request to send."""
+    if mode in ("single", "queued"):
+        return [("/push-data", {"json": record}, 1) for record in records]
+    batches = [records[start:start + batch_size] for start in range(0, len(records), batch_size)]
+    if mode == "batch":
+        return [("/push-data/batch", {"json": batch}, len(batch)) for batch in batches]
+    return [
+        ("/push-data/stream", {
+            "content": "".join(json.dumps(record) + "\n" for record in batch).encode(),
+            "headers": {"Content-Type": "application/x-ndjson"},
+        }, len(batch))
+        for batch in batches
+    ]
+
+
+async def _run(args: argparse.Namespace, database_url: str) -> dict:
+    import httpx
+    from sqlalchemy import text
+
+    from app import api
+
+    api.limiter.enabled = False
+    per_request = 1 if args.mode in ("single", "queued") else args.batch_size
+    records = synthetic_records(args.requests * per_request, seed=args.seed)
+    planned = _requests(args.mode, records, args.batch_size)
+
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    accepted = 0
+    pending: asyncio.Queue = asyncio.Queue()
+    for item in planned:
+        pending.put_nowait(item)
+
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test",
+                                     headers={"X-API-KEY": API_KEY}, timeout=None) as client:
+
+            async def worker() -> None:
+                nonlocal accepted
+                while not pending.empty():
+                    path, kwargs, count = pending.get_nowait()
+                    started = time.perf_counter()
+                    try:
+                        response = await client.post(path, **kwargs)
+                        status = str(response.status_code)
+                    except httpx.HTTPError as e:
+                        status = type(e).__name__
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+                    if status.startswith("2"):
+                        accepted += count
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+    # Counted after shutdown, once the write queue (if any) has drained
+    drained = time.perf_counter() - started
+    engine = api.create_db_engine(database_url)
+    try:
+        async with engine.connect() as conn:
+            rows_in_table = (await conn.execute(text("SELECT COUNT(*) FROM outbreaks"))).scalar_one()
+    finally:
+        await engine.dispose()
+
+    latency_ms = np.asarray(latencies) * 1000
+    failed = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "mode": args.mode,
+        "database": database_url.split(":", 1)[0],
+        "requests": len(planned),
+        "records": len(records),
+        "concurrency": args.concurrency,
+        "batch_size": per_request,
+        "elapsed_seconds": round(elapsed, 3),
+        "drained_seconds": round(drained, 3),
+        "throughput": {
+            "requests_per_second": round(len(planned) / elapsed, 1),
+            "records_per_second": round(accepted / elapsed, 1),
+        },
+        "latency_ms": {
+            "mean": round(float(latency_ms.mean()), 2),
+            "p50": round(float(np.percentile(latency_ms, 50)), 2),
+            "p95": round(float(np.percentile(latency_ms, 95)), 2),
+            "p99": round(float(np.percentile(latency_ms, 99)), 2),
+            "max": round(float(latency_ms.max()), 2),
+        },
+        "errors": {
+            "count": failed,
+            "rate": round(failed / len(planned), 4),
+            "by_status": dict(sorted(statuses.items())),
+        },
+        "rows_in_table": rows_in_table,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=MODES, default="batch")
+    parser.add_argument("--requests", type=int, default=200, help="number of requests to send")
+    parser.add_argument("--batch-size", type=int, default=500, help="records per batch/stream request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="async SQLAlchemy URL (default: a temporary SQLite file)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="load_api_") as directory:
+        database_url = args.database_url or _sqlite_database(directory)
+        _configure(database_url, args.mode)
+        report = asyncio.run(_run(args, database_url))
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Seeded generator for synthetic outbreaks tables with the real schema."""
+from __future__ import annotations
+
+import string
+
+import numpy as np
+import pandas as pd
+
+from app.gazetteer import gazetteer
+
+# The outbreaks table on SQLite, standing in for Postgres in the load test
+# and the tests; required fields match ``OutbreakRecord``
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbreaks (
+    row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    year INTEGER NOT NULL, disease TEXT NOT NULL, country TEXT NOT NULL, iso3 TEXT, icd10n TEXT,
+    unsd_region TEXT, unsd_subregion TEXT, who_region TEXT, DONs TEXT
+)
+"""
+
+UNSD_REGIONS = {
+    "Africa": ("Sub-Saharan Africa", "African Region"),
+    "Americas": ("Latin America and the Caribbean", "Region of the Americas"),
+    "Asia": ("South-eastern Asia", "South-East Asia Region"),
+    "Europe": ("Western Europe", "European Region"),
+    "Oceania": ("Melanesia", "Western Pacific Region"),
+}
+
+
+def _iso3(index: int) -> str:
+    letters = string.ascii_uppercase
+    return letters[index // 676 % 26] + letters[index // 26 % 26] + letters[index % 26]
+
+
+def _countries(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Names and ISO3 codes: real gazetteer countries first, then made-up ones."""
+    known = gazetteer().iso3[:n]
+    names = [f"Country {code}" for code in known]
+    codes = list(known)
+    for i in range(n - len(known)):
+        names.append(f"Country {i:03d}")
+        codes.append(f"X{_iso3(i)[1:]}")
+    return np.array(names, dtype=object), np.array(codes, dtype=object)
+
+
+def synthetic_outbreaks(
+    rows: int,
+    seed: int = 42,
+    countries: int = 200,
+    diseases: int = 150,
+    categories: int = 25,
+    years: tuple[int, int] = (1996, 2025),
+) -> pd.DataFrame:
+    """Return ``rows`` synthetic outbreak records as the database would.
+
+    Label columns are plain, non-categorical strings (as read from Postgres), with
+    Zipf-like frequencies so a few countries and diseases dominate, like the
+    real WHO DON data. Countries carry real ISO3 codes from the gazetteer. The same seed always produces the same table.
+    """
+    rng = np.random.default_rng(seed)
+
+    def skewed(n: int) -> np.ndarray:
+        weights = 1.0 / np.arange(1, n + 1)
+        return rng.choice(n, size=rows, p=weights / weights.sum())
+
+    regions = list(UNSD_REGIONS)
+    country_region = np.arange(countries) % len(regions)
+    disease_category = np.arange(diseases) % categories
+
+    country_idx = skewed(countries)
+    disease_idx = skewed(diseases)
+    region_idx = country_region[country_idx]
+
+    country_names, iso3_codes = _countries(countries)
+    disease_names = np.array([f"Disease {i:03d}" for i in range(diseases)], dtype=object)
+    category_names = np.array([f"Category {i:02d}" for i in range(categories)], dtype=object)
+    region_names = np.array(regions, dtype=object)
+    subregion_names = np.array([UNSD_REGIONS[r][0] for r in regions], dtype=object)
+    who_names = np.array([UNSD_REGIONS[r][1] for r in regions], dtype=object)
+
+    return pd.DataFrame({
+        "row_id": np.arange(1, rows + 1, dtype="int64"),
+        "year": rng.integers(years[0], years[1] + 1, size=rows),
+        "disease": disease_names[disease_idx],
+        "country": country_names[country_idx],
+        "iso3": iso3_codes[country_idx],
+        "icd10n": category_names[disease_category[disease_idx]],
+        "unsd_region": region_names[region_idx],
+        "unsd_subregion": subregion_names[region_idx],
+        "who_region": who_names[region_idx],
+    })
@@ -0,0 +1,48 @@
+"""Shared fixtures: a throwaway SQLite ``outbreaks`` table behind async engines.
+
+Run from the repository root with ``python -m pytest tests``. Async code is
+driven with ``asyncio.run`` so no pytest plugin is needed.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from benchmarks.synthetic import SQLITE_SCHEMA
+
+
+@pytest.fixture
+def database(tmp_path) -> str:
+    """Path of a SQLite file holding an empty ``outbreaks`` table."""
+    path = tmp_path / "outbreaks.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(SQLITE_SCHEMA)
+    return str(path)
+
+
+@pytest.fixture
+def database_url(database: str) -> str:
+    return f"sqlite+aiosqlite:///{database}"
+
+
+def count_rows(database: str) -> int:
+    with sqlite3.connect(database) as conn:
+        return conn.execute("SELECT COUNT(*) FROM outbreaks").fetchone()[0]
+
+
+def insert_row(database: str, row_id: int, **overrides) -> None:
+    """Insert ``record(row_id)`` with an explicit ``row_id``, as a separate commit."""
+    row = {"row_id": row_id, **record(row_id, **overrides)}
+    with sqlite3.connect(database) as conn:
+        conn.execute(f"INSERT INTO outbreaks ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                     list(row.values()))
+
+
+def record(i: int = 0, **overrides) -> dict:
+    """A validated ``OutbreakRecord`` payload."""
+    return {
+        "year": 2020, "disease": "Cholera", "country": "Nigeria", "iso3": "NGA", "icd10n": "A00",
+        "unsd_region": "Africa", "unsd_subregion": "Western Africa", "who_region": "AFRO",
+        "DONs": f"DON{i:06d}", **overrides,
+    }
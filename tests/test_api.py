@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from tests.conftest import count_rows, insert_row, record
+
+API_KEY = "test"
+
+
+@pytest.fixture
+def api(database_url):
+    """The API module serving a fresh SQLite table, rate limits off."""
+    os.environ.setdefault("API_KEY", API_KEY)
+    os.environ.setdefault("DATABASE_URL", database_url)
+    from app import api
+
+    api.limiter.enabled = False
+    api.API_KEY = API_KEY
+    api.app.state.engine = api.create_db_engine(database_url)
+    api.app.state.write_queue = None
+    yield api
+    asyncio.run(api.app.state.engine.dispose())
+
+
+def run_client(api, scenario) -> None:
+    async def main() -> None:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                     headers={"X-API-KEY": API_KEY}) as client:
+            await scenario(client)
+    asyncio.run(main())
+
+
+def test_etag_changes_when_rows_commit_below_the_latest_id(api, database):
+    async def scenario(client):
+        for row_id in (1, 3):
+            insert_row(database, row_id)
+        first = await client.get("/outbreaks/aggregate", params={"by": "year"})
+        etag = first.headers["etag"]
+        cached = await client.get("/outbreaks/aggregate", params={"by": "year"}, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+        # Committed after row 3: MAX(row_id) is unchanged
+        insert_row(database, 2)
+        fresh = await client.get("/outbreaks/aggregate", params={"by": "year"}, headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.json()["groups"] == [{"year": 2020, "outbreaks": 3}]
+
+    run_client(api, scenario)
+
+
+def test_etag_is_shared_by_gzip_and_identity_encodings(api):
+    async def scenario(client):
+        for i in range(40):
+            await client.post("/push-data", json=record(i))
+        zipped = await client.get("/outbreaks", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/outbreaks", headers={"Accept-Encoding": "identity"})
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["etag"] == plain.headers["etag"]
+        assert zipped.headers["etag"].startswith("W/")
+        # Strong and weak forms of the tag both validate
+        strong = zipped.headers["etag"].removeprefix("W/")
+        again = await client.get("/outbreaks", headers={"If-None-Match": strong})
+        assert again.status_code == 304
+
+    run_client(api, scenario)
+
+
+def test_stream_reports_chunks_committed_before_the_row_limit(api, database, monkeypatch):
+    import json
+
+    from limits import parse as parse_rate_limit
+    from limits.storage import MemoryStorage
+    from limits.strategies import MovingWindowRateLimiter
+
+    monkeypatch.setattr(api, "BATCH_ROW_RATE_LIMIT", parse_rate_limit("10/hour"))
+    monkeypatch.setattr(api, "row_limiter", MovingWindowRateLimiter(MemoryStorage()))
+    body = "".join(json.dumps(record(i)) + "\n" for i in range(12)).encode()
+
+    async def scenario(client):
+        response = await client.post("/push-data/stream", params={"chunk_size": 5}, content=body,
+                                     headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 429
+        detail = response.json()["detail"]
+        assert detail["message"].startswith("Row rate limit exceeded")
+        assert detail["accepted"] == 10
+
+    run_client(api, scenario)
+    assert count_rows(database) == 10
+
+
+def test_batch_rows_accepts_records_and_columns(api):
+    records = [record(0), record(1)]
+    assert api.batch_rows(records) is records
+    columnar = {"year": [2020, 2021], "disease": ["Cholera", "Ebola"], "country": ["Nigeria", "Guinea"]}
+    assert api.batch_rows(columnar) == [
+        {"year": 2020, "disease": "Cholera", "country": "Nigeria"},
+        {"year": 2021, "disease": "Ebola", "country": "Guinea"},
+    ]
+    with pytest.raises(api.HTTPException) as excinfo:
+        api.batch_rows({"year": [2020, 2021], "disease": ["Cholera"]})
+    assert excinfo.value.status_code == 422
+
+
+def test_batch_columnar_upload(api, database):
+    columnar = {"year": [2020, 2021, 2022], "disease": ["Cholera", "Ebola", "Mpox"],
+                "country": ["Nigeria", "Guinea", "Nigeria"]}
+
+    async def scenario(client):
+        response = await client.post("/push-data/batch", json=columnar)
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "inserted": 3, "rejected": 0, "errors": []}
+
+    run_client(api, scenario)
+    assert count_rows(database) == 3
+
+
+def test_batch_partial_upload_reports_invalid_rows(api, database):
+    rows = [record(0), {"disease": "Cholera", "country": "Nigeria"}, record(2), record(3, year="soon")]
+
+    async def scenario(client):
+        response = await client.post("/push-data/batch", json=rows)
+        body = response.json()
+        assert response.status_code == 200
+        assert (body["status"], body["inserted"], body["rejected"]) == ("partial", 2, 2)
+        assert [error["index"] for error in body["errors"]] == [1, 3]
+        assert body["errors"][0]["errors"][0]["field"] == "year"
+
+    run_client(api, scenario)
+    assert count_rows(database) == 2
+
+
+def test_batch_with_no_valid_rows_is_rejected(api, database):
+    async def scenario(client):
+        response = await client.post("/push-data/batch", json=[{"year": 2020}, {"disease": "Cholera"}])
+        assert response.status_code == 422
+        assert response.json()["detail"]["inserted"] == 0
+        assert response.json()["detail"]["rejected"] == 2
+        empty = await client.post("/push-data/batch", json=[])
+        assert empty.status_code == 422
+
+    run_client(api, scenario)
+    assert count_rows(database) == 0
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from app.backends import SqlBackend
+from tests.conftest import insert_row
+
+
+def test_sql_backend_sees_rows_committed_below_the_latest_id(database):
+    backend = SqlBackend(create_engine(f"sqlite:///{database}"), version_ttl=0)
+    for row_id in (1, 3):
+        insert_row(database, row_id)
+    assert backend.aggregate({}, ["year"])["outbreaks"].tolist() == [2]
+
+    # Committed after row 3: MAX(row_id) is unchanged, the cached result is not
+    insert_row(database, 2)
+    assert backend.aggregate({}, ["year"])["outbreaks"].tolist() == [3]
+
+
+def test_sql_backend_waits_for_migrations(tmp_path):
+    import pytest
+
+    from app.backends import SchemaNotMigrated
+
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE outbreaks (year INTEGER, disease TEXT, country TEXT)")
+    backend = SqlBackend(create_engine(f"sqlite:///{path}"))
+    with pytest.raises(SchemaNotMigrated):
+        backend.columns()
+
+    # Detected again on the next attempt, once the deploy step has run
+    with sqlite3.connect(path) as conn:
+        conn.execute("ALTER TABLE outbreaks ADD COLUMN row_id INTEGER")
+    assert "row_id" in backend.columns()
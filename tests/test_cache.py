@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pandas as pd
+
+import app.cache as cache
+from app.cache import CacheEntry, SharedFrameCache
+
+
+class Loader:
+    """Counts calls and records the previous entry each one received."""
+
+    def __init__(self, delay: float = 0) -> None:
+        self.delay = delay
+        self.previous: list[CacheEntry | None] = []
+
+    def __call__(self, previous: CacheEntry | None) -> CacheEntry:
+        self.previous.append(previous)
+        time.sleep(self.delay)
+        return CacheEntry(frame=pd.DataFrame({"year": [len(self.previous)]}), source="database")
+
+
+def test_entries_are_served_until_the_ttl_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    frames = SharedFrameCache(ttl=60)
+    load = Loader()
+
+    first = frames.get_or_load("k", load)
+    now[0] += 59
+    assert frames.get_or_load("k", load) is first
+    now[0] += 2
+    second = frames.get_or_load("k", load)
+    assert second is not first
+    assert load.previous == [None, first]
+    assert second.frame.attrs["dataset_version"] != first.frame.attrs["dataset_version"]
+
+
+def test_invalidation_tokens():
+    frames = SharedFrameCache(ttl=3600)
+    load = Loader()
+    first = frames.get_or_load("k", load)
+    other = frames.get_or_load("other", load)
+
+    # Soft: the loader gets the stale entry to refresh from
+    frames.invalidate("k")
+    second = frames.get_or_load("k", load)
+    assert load.previous[-1] is first
+    # Hard: the stale entry is dropped
+    frames.invalidate("k", hard=True)
+    frames.get_or_load("k", load)
+    assert load.previous[-1] is None
+    # Other keys are untouched
+    assert frames.get_or_load("other", load) is other
+    assert second.token == 1
+
+
+def test_unchanged_frame_keeps_its_version():
+    frames = SharedFrameCache(ttl=3600)
+    first = frames.get_or_load("k", Loader())
+    frames.invalidate("k")
+    same = frames.get_or_load("k", lambda previous: CacheEntry(frame=previous.frame, source="database"))
+    assert same.version == first.version
+
+
+def test_concurrent_misses_are_coalesced():
+    frames = SharedFrameCache(ttl=3600)
+    load = Loader(delay=0.05)
+    start = threading.Barrier(8)
+    results: list[CacheEntry] = []
+
+    def reader() -> None:
+        start.wait()
+        results.append(frames.get_or_load("k", load))
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(load.previous) == 1
+    assert len(results) == 8 and all(entry is results[0] for entry in results)
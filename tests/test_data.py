@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine
+
+from app.data import OUTBREAK_COLUMNS, _read_outbreaks, _refresh_delta
+from tests.conftest import insert_row
+
+
+def test_refresh_appends_rows_past_the_watermark(database):
+    engine = create_engine(f"sqlite:///{database}")
+    for row_id in (1, 2):
+        insert_row(database, row_id)
+    frame, watermark = _read_outbreaks(engine, OUTBREAK_COLUMNS)
+    insert_row(database, 3)
+
+    frame, watermark = _refresh_delta(engine, frame, watermark)
+    assert watermark == 3
+    assert frame["row_id"].tolist() == [1, 2, 3]
+
+
+def test_refresh_detects_rows_committed_below_the_watermark(database):
+    engine = create_engine(f"sqlite:///{database}")
+    for row_id in (1, 2, 4):
+        insert_row(database, row_id)
+    frame, watermark = _read_outbreaks(engine, OUTBREAK_COLUMNS)
+    assert watermark == 4
+
+    # Row 3 was inserted by a transaction that committed after row 4
+    insert_row(database, 3)
+    assert _refresh_delta(engine, frame, watermark) is None
+
+    insert_row(database, 5)
+    assert _refresh_delta(engine, frame, watermark) is None
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.filter_index import FilterIndex
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "year": [2019, 2020, 2020, 2021, 2021, 2021],
+        "disease": pd.Categorical(["Cholera", "Ebola", "Cholera", None, "Cholera", "Ebola"]),
+        "iso3": pd.Categorical(["NGA", "COD", "NGA", "NGA", "GIN", "GIN"]),
+    })
+
+
+def _rows(df: pd.DataFrame, **criteria) -> np.ndarray:
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in criteria.items():
+        mask &= df[column].isin(values).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def test_select_matches_a_boolean_mask():
+    df = _frame()
+    index = FilterIndex(df)
+    criteria = {"year": [2020, 2021], "disease": ["Cholera"], "iso3": ["NGA", "GIN"]}
+    assert index.select(criteria).tolist() == _rows(df, **criteria).tolist() == [2, 4]
+
+
+def test_missing_values_only_match_when_unconstrained():
+    index = FilterIndex(_frame())
+    assert index.select({"disease": ["Cholera", "Ebola"]}).tolist() == [0, 1, 2, 4, 5]
+    assert index.select({"disease": None, "year": [2021]}).tolist() == [3, 4, 5]
+
+
+def test_selecting_every_value_is_skipped():
+    index = FilterIndex(_frame())
+    assert index.select({"year": [2019, 2020, 2021], "iso3": None}) is None
+    # Unknown values are ignored rather than matched
+    assert index.select({"iso3": ["NGA", "COD", "GIN", "XXX"]}) is None
+    assert index.select({"year": [2019, 2020, 2021], "iso3": ["COD"]}).tolist() == [1]
+
+
+def test_empty_intersections():
+    index = FilterIndex(_frame())
+    assert index.select({"year": [2019], "iso3": ["GIN"]}).tolist() == []
+    assert index.select({"year": [1990]}).tolist() == []
+    assert index.select({"disease": [], "year": [2020]}).tolist() == []
+
+
+def test_value_counts_among_selected_rows():
+    index = FilterIndex(_frame())
+    rows = index.select({"year": [2020, 2021]})
+    assert index.value_counts("iso3", rows).to_dict() == {"NGA": 2, "GIN": 2, "COD": 1}
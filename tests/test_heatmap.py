@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from app.charts.heatmap import MAX_POINTS_PER_COUNTRY, generate_sample_coordinates, heatmap_figure
+from app.gazetteer import gazetteer
+
+
+def _coordinates(outbreaks: int) -> pd.DataFrame:
+    codes = list(gazetteer().iso3)
+    return generate_sample_coordinates(pd.DataFrame({"iso3": codes, "country": codes, "Outbreaks": outbreaks}))
+
+
+def test_auto_bins_real_point_counts():
+    coords = _coordinates(10)
+    assert len(coords) == MAX_POINTS_PER_COUNTRY * len(gazetteer().iso3)
+    _, caption = heatmap_figure(coords, "Viridis", "Global", mode="auto")
+    assert "density cells" in caption
+
+
+def test_cached_figure_reports_its_payload_without_serializing(monkeypatch):
+    coords = _coordinates(3)
+    _, first = heatmap_figure(coords, "Viridis", "Africa", mode="points")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("figure serialized again")
+
+    monkeypatch.setattr(go.Figure, "to_json", fail)
+    _, again = heatmap_figure(coords, "Plasma", "Africa", mode="points")
+    assert again == first
+    assert "figure payload" in again
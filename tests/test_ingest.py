@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.ingest as ingest
+from app.ingest import PartialIngest, UploadParseError, iter_csv, iter_lines, iter_ndjson, stream_ingest
+from tests.conftest import count_rows, record
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def _parse(parser, *chunks: bytes) -> list[tuple[dict | None, str | None]]:
+    async def collect():
+        return [item async for item in parser(iter_lines(_chunks(*chunks)))]
+    return asyncio.run(collect())
+
+
+def test_csv_reassembles_quoted_fields_across_lines():
+    body = b'Year,Disease,Country,Notes\n2020,"Cholera,\nsuspected",Nigeria,x\n2021,Ebola,"Congo,\n\nDRC",\n'
+    assert _parse(iter_csv, body) == [
+        ({"year": "2020", "disease": "Cholera,\nsuspected", "country": "Nigeria"}, None),
+        ({"year": "2021", "disease": "Ebola", "country": "Congo,\n\nDRC"}, None),
+    ]
+
+
+def test_csv_quoted_field_split_between_chunks():
+    assert _parse(iter_csv, b'year,disease,country\n2020,"Chol', b'era\nA",Nigeria\n') == [
+        ({"year": "2020", "disease": "Cholera\nA", "country": "Nigeria"}, None),
+    ]
+
+
+def test_csv_skips_hxl_row_and_reports_bad_rows():
+    body = b'year,disease,country\n#date,#disease,#country\n2020,Cholera\n2021,Ebola,Guinea\n2022,"open\n'
+    assert _parse(iter_csv, body) == [
+        (None, "Expected 3 columns, got 2"),
+        ({"year": "2021", "disease": "Ebola", "country": "Guinea"}, None),
+        (None, "Unterminated quoted field at end of upload"),
+    ]
+
+
+def test_csv_stray_quote_inside_a_field_is_literal():
+    body = b'year,disease,country\n2020,Cholera 12" sample,Nigeria\n2021,Ebola,Guinea\n'
+    assert _parse(iter_csv, body) == [
+        ({"year": "2020", "disease": 'Cholera 12" sample', "country": "Nigeria"}, None),
+        ({"year": "2021", "disease": "Ebola", "country": "Guinea"}, None),
+    ]
+
+
+def test_csv_unterminated_field_is_capped_and_parsing_resumes(monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_CSV_RECORD_CHARS", 40)
+    body = b'year,disease,country\n2020,"Cholera,Nigeria\n' + b"2021,Ebola,Guinea\n" * 5
+    parsed = _parse(iter_csv, body)
+    assert parsed[0] == (None, "Unterminated quoted field (over 40 characters)")
+    assert parsed[1:] == [({"year": "2021", "disease": "Ebola", "country": "Guinea"}, None)] * 5
+
+
+def test_csv_malformed_row_is_reported():
+    body = b'year,disease,country\n2020,Chol\rera,Nigeria\n2021,Ebola,Guinea\n'
+    (record, error), *rest = _parse(iter_csv, body)
+    assert record is None and error.startswith("Malformed CSV row: new-line character")
+    assert rest == [({"year": "2021", "disease": "Ebola", "country": "Guinea"}, None)]
+
+
+def test_ndjson_error_paths():
+    body = b'{"year": 2020}\n\n{"year": \n[1, 2]\n"text"\r\n{"year": 2021}'
+    parsed = _parse(iter_ndjson, body)
+    assert parsed[0] == ({"year": 2020}, None)
+    assert parsed[1][0] is None and parsed[1][1].startswith("Invalid JSON: ")
+    assert parsed[2:] == [
+        (None, "Record must be a JSON object"),
+        (None, "Record must be a JSON object"),
+        ({"year": 2021}, None),
+    ]
+
+
+def test_invalid_utf8_is_raised():
+    with pytest.raises(UnicodeDecodeError):
+        _parse(iter_ndjson, b'{"disease": "\xff"}\n')
+
+
+def test_stream_reports_undecodable_uploads_as_parse_errors(database_url):
+    async def main():
+        engine = create_async_engine(database_url)
+        try:
+            await stream_ingest(engine, iter_ndjson(iter_lines(_chunks(b'{"disease": "\xff"}\n'))))
+        finally:
+            await engine.dispose()
+
+    with pytest.raises(PartialIngest) as excinfo:
+        asyncio.run(main())
+    assert isinstance(excinfo.value.cause, UploadParseError)
+
+
+def test_stream_commits_each_chunk_before_a_failure(database, database_url):
+    async def records():
+        for i in range(10):
+            yield record(i), None
+
+    charged = []
+
+    def on_chunk(rows: int) -> None:
+        if len(charged) == 2:
+            raise RuntimeError("rate limited")
+        charged.append(rows)
+
+    async def main():
+        engine = create_async_engine(database_url)
+        try:
+            return await stream_ingest(engine, records(), chunk_size=4, on_chunk=on_chunk)
+        finally:
+            await engine.dispose()
+
+    with pytest.raises(PartialIngest) as excinfo:
+        asyncio.run(main())
+    assert isinstance(excinfo.value.cause, RuntimeError)
+    assert excinfo.value.result["accepted"] == 8
+    assert count_rows(database) == 8
+
+
+def test_stream_write_failure_stops_the_producer(database_url, monkeypatch):
+    async def failing_write_rows(conn, rows):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(ingest, "write_rows", failing_write_rows)
+
+    async def records():
+        for i in range(50):
+            yield record(i), None
+
+    async def main():
+        engine = create_async_engine(database_url)
+        try:
+            with pytest.raises(PartialIngest) as excinfo:
+                await stream_ingest(engine, records(), chunk_size=2)
+            await asyncio.sleep(0)  # let the closed generators finalize
+            others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()]
+            return excinfo.value, others
+        finally:
+            await engine.dispose()
+
+    error, pending = asyncio.run(main())
+    assert isinstance(error.cause, RuntimeError)
+    assert error.result["accepted"] == 0
+    assert pending == []
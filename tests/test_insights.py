@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from app.charts.insights import OTHER_LABEL, summarize, top_n_with_other
+
+
+def test_top_n_with_other_sums_the_tail():
+    counts = pd.Series({"Cholera": 5, "Ebola": 9, "Mpox": 1, "Measles": 3, "Zika": 2})
+    result = top_n_with_other(counts, 2)
+    assert result.to_dict() == {"Ebola": 9, "Cholera": 5, OTHER_LABEL: 6}
+    assert result.sum() == counts.sum()
+
+
+def test_top_n_with_other_without_a_tail():
+    counts = pd.Series({"Cholera": 5, "Ebola": 9})
+    assert top_n_with_other(counts, 2).to_dict() == {"Ebola": 9, "Cholera": 5}
+    assert OTHER_LABEL not in top_n_with_other(counts, 10).index
+
+
+def test_top_n_with_other_keeps_tie_order():
+    counts = pd.Series({"A": 2, "B": 2, "C": 2, "D": 1})
+    assert list(top_n_with_other(counts, 2).index) == ["A", "B", OTHER_LABEL]
+
+
+def test_top_n_with_other_handles_categorical_labels():
+    counts = pd.Series([4, 1, 2], index=pd.CategoricalIndex(["Cholera", "Mpox", "Zika"]))
+    assert top_n_with_other(counts, 1).to_dict() == {"Cholera": 4, OTHER_LABEL: 3}
+
+
+def test_summarize_buckets_the_disease_tail():
+    df = pd.DataFrame({
+        "year": [2020, 2020, 2021, 2021, 2021],
+        "disease": pd.Categorical(["Cholera", "Cholera", "Ebola", "Mpox", "Cholera"]),
+        "country": pd.Categorical(["Nigeria", "Ghana", "Guinea", "Nigeria", "Nigeria"]),
+    })
+    summaries = summarize(df, top_n=1)
+    assert summaries.all_diseases.to_dict("records") == [
+        {"disease": "Cholera", "count": 3}, {"disease": OTHER_LABEL, "count": 2},
+    ]
+    assert summaries.by_year.to_dict("records") == [{"year": 2020, "Outbreaks": 2}, {"year": 2021, "Outbreaks": 3}]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+
+from app.metrics import Registry
+
+
+def test_render_histogram_buckets_sum_and_count():
+    registry = Registry()
+    latency = registry.histogram("req_seconds", "Request latency.", ("route",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value, route="/data")
+
+    assert registry.render().splitlines() == [
+        "# HELP req_seconds Request latency.",
+        "# TYPE req_seconds histogram",
+        'req_seconds_bucket{route="/data",le="0.1"} 2.0',
+        'req_seconds_bucket{route="/data",le="1.0"} 3.0',
+        'req_seconds_bucket{route="/data",le="+Inf"} 4.0',
+        'req_seconds_sum{route="/data"} 2.65',
+        'req_seconds_count{route="/data"} 4.0',
+    ]
+
+
+def test_render_unlabelled_metrics_sorted_by_name():
+    registry = Registry()
+    registry.gauge("b_rows", "Rows loaded.").set(3)
+    registry.counter("a_total", "Things done.").inc(2)
+
+    assert registry.render() == (
+        "# HELP a_total Things done.\n"
+        "# TYPE a_total counter\n"
+        "a_total 2.0\n"
+        "# HELP b_rows Rows loaded.\n"
+        "# TYPE b_rows gauge\n"
+        "b_rows 3.0\n"
+    )
+
+
+def test_render_escapes_label_values():
+    registry = Registry()
+    registry.counter("errors_total", "Errors.", ("message",)).inc(message='bad "row"\n')
+    assert 'errors_total{message="bad \\"row\\"\\n"} 1.0' in registry.render()
+
+
+def test_render_lists_registered_metric_without_samples():
+    registry = Registry()
+    registry.histogram("idle_seconds", "Never observed.")
+    assert registry.render() == "# HELP idle_seconds Never observed.\n# TYPE idle_seconds histogram\n"
+
+
+def test_registering_a_name_twice_returns_the_same_metric():
+    registry = Registry()
+    assert registry.counter("hits", "Hits.") is registry.counter("hits", "Hits.")
+    with pytest.raises(ValueError):
+        registry.gauge("hits", "Hits.")
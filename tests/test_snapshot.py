@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+import app.snapshot as snapshot
+from app.data import OUTBREAK_COLUMNS, normalize
+from app.snapshot import read_snapshot, write_snapshot
+from tests.conftest import record
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    rows = [{"row_id": i, **record(i, year=2018 + i % 3)} for i in range(1, 7)]
+    return normalize(pd.DataFrame(rows))
+
+
+def test_round_trip_keeps_rows_dtypes_and_stamp(tmp_path, frame):
+    path = str(tmp_path / "nested" / "outbreaks.arrow")
+    write_snapshot(path, frame, watermark=6)
+
+    restored, info = read_snapshot(path, OUTBREAK_COLUMNS)
+    pd.testing.assert_frame_equal(restored, frame.reset_index(drop=True))
+    assert (info.watermark, info.rows, info.format) == (6, len(frame), snapshot.SNAPSHOT_FORMAT)
+
+
+def test_other_format_is_ignored(tmp_path, frame):
+    import json
+
+    import pyarrow as pa
+
+    path = str(tmp_path / "outbreaks.arrow")
+    write_snapshot(path, frame, watermark=6)
+    # Restamp the file as written by an incompatible version
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    info = json.loads(table.schema.metadata[snapshot._METADATA_KEY])
+    info["format"] = snapshot.SNAPSHOT_FORMAT + 1
+    table = table.replace_schema_metadata({**table.schema.metadata, snapshot._METADATA_KEY: json.dumps(info)})
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    assert read_snapshot(path, OUTBREAK_COLUMNS) is None
+
+
+def test_columns_outside_the_expected_set_are_ignored(tmp_path, frame):
+    path = str(tmp_path / "outbreaks.arrow")
+    write_snapshot(path, frame, watermark=None)
+    assert read_snapshot(path, [column for column in OUTBREAK_COLUMNS if column != "iso3"]) is None
+    assert read_snapshot(path, OUTBREAK_COLUMNS)[1].watermark is None
+
+
+def test_missing_or_corrupt_file(tmp_path):
+    path = tmp_path / "outbreaks.arrow"
+    assert read_snapshot(str(path), OUTBREAK_COLUMNS) is None
+    path.write_bytes(b"not an arrow file")
+    assert read_snapshot(str(path), OUTBREAK_COLUMNS) is None
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from app.charts.heatmap import MAX_POINTS_PER_COUNTRY
+from app.gazetteer import gazetteer
+from app.surface import choose_engine
+
+# The most points real data can produce: every gazetteer entry, fully repeated
+MAX_REAL_POINTS = MAX_POINTS_PER_COUNTRY * len(gazetteer().iso3)
+
+
+@pytest.mark.parametrize("region", ["Africa", "Global"])
+def test_auto_uses_kde_for_wide_regions(region):
+    assert choose_engine("auto", 50, region) == "kde"
+    assert choose_engine("auto", MAX_REAL_POINTS, region) == "kde"
+
+
+def test_auto_interpolates_within_a_country():
+    assert choose_engine("auto", MAX_POINTS_PER_COUNTRY, "Nigeria") == "interpolate"
+
+
+def test_explicit_engine_wins():
+    assert choose_engine("interpolate", MAX_REAL_POINTS, "Global") == "interpolate"
+    with pytest.raises(ValueError):
+        choose_engine("spline", 10)
+
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.write_queue import WriteQueue
+from tests.conftest import count_rows, record
+
+
+def _run_queue(database_url: str, scenario) -> None:
+    async def main() -> None:
+        engine = create_async_engine(database_url)
+        try:
+            await scenario(engine)
+        finally:
+            await engine.dispose()
+    asyncio.run(main())
+
+
+def test_submit_then_stop_immediately(database, database_url):
+    async def scenario(engine):
+        queue = WriteQueue(engine, flush_rows=10, flush_ms=50)
+        queue.start()
+        assert queue.submit(record())
+        await asyncio.wait_for(queue.stop(), 5)
+        assert not queue.submit(record(1))
+
+    _run_queue(database_url, scenario)
+    assert count_rows(database) == 1
+
+
+def test_stop_drains_under_concurrent_submits(database, database_url):
+    async def scenario(engine):
+        queue = WriteQueue(engine, flush_rows=7, flush_ms=1)
+
+        async def producer(offset: int) -> None:
+            for i in range(25):
+                assert queue.submit(record(offset + i))
+                await asyncio.sleep(0)
+
+        queue.start()
+        await asyncio.gather(*(producer(100 * n) for n in range(8)))
+        await asyncio.wait_for(queue.stop(), 5)
+
+    _run_queue(database_url, scenario)
+    assert count_rows(database) == 200
+
+
+def test_stop_without_start_flushes(database, database_url):
+    async def scenario(engine):
+        queue = WriteQueue(engine, flush_rows=2)
+        for i in range(5):
+            queue.submit(record(i))
+        await asyncio.wait_for(queue.stop(), 5)
+
+    _run_queue(database_url, scenario)
+    assert count_rows(database) == 5
+
+
+def test_full_queue_rejects(database_url):
+    async def scenario(engine):
+        queue = WriteQueue(engine, max_rows=2, flush_rows=2)
+        assert queue.submit(record(0)) and queue.submit(record(1))
+        assert not queue.submit(record(2))
+        await queue.stop()
+
+    _run_queue(database_url, scenario)
+
+
+def test_rejected_record_does_not_drop_its_batch(database, database_url):
+    async def scenario(engine):
+        queue = WriteQueue(engine, flush_rows=10, flush_ms=1000)
+        queue.start()
+        for i in range(10):
+            # NOT NULL violation: the multi-row INSERT fails as a whole
+            queue.submit(record(i, disease=None) if i == 3 else record(i))
+        await asyncio.wait_for(queue.stop(), 5)
+
+    _run_queue(database_url, scenario)
+    assert count_rows(database) == 9
+
+
+def test_transient_failure_is_retried(database, database_url, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    import app.write_queue as write_queue
+
+    calls = []
+    real_write_rows = write_queue.write_rows
+
+    async def flaky_write_rows(conn, rows):
+        calls.append(len(rows))
+        if len(calls) < 3:
+            raise OperationalError("INSERT", {}, Exception("connection reset"))
+        await real_write_rows(conn, rows)
+
+    monkeypatch.setattr(write_queue, "write_rows", flaky_write_rows)
+    monkeypatch.setattr(write_queue, "FLUSH_BACKOFF_SECONDS", 0.001)
+
+    async def scenario(engine):
+        queue = WriteQueue(engine, flush_rows=5)
+        queue.start()
+        for i in range(5):
+            queue.submit(record(i))
+        await asyncio.wait_for(queue.stop(), 5)
+
+    _run_queue(database_url, scenario)
+    assert calls == [5, 5, 5]
+    assert count_rows(database) == 5